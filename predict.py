@@ -1,7 +1,13 @@
+import os
+import sys
+
+# The model package uses flat imports (it is normally run from its own folder)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src', 'components', 'model')))
+
 # Import the Flask app from the main application file
 from src.components.model.predict import app
 
 # Run the Flask app if this file is executed directly
 if __name__ == '__main__':
     print("Disease Risk Assessment App is running on http://127.0.0.1:5000/")
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=True)
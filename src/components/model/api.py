@@ -0,0 +1,366 @@
+"""
+JSON API for scoring patients without going through the HTML forms.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from flask import Blueprint, jsonify, request
+
+from metrics import metrics, LATENCY_MS_BOUNDS
+from caching import result_cache
+from features import read_fields
+from scoring import (HEART_SCHEMA, KIDNEY_SCHEMA, DIABETES_SCHEMA,
+                     calculate_rule_based_heart_risk_batch, calculate_rule_based_kidney_risk_batch,
+                     calculate_rule_based_diabetes_risk_batch, calculate_insurance_premium, combine_risks,
+                     blend_diabetes_risk, HIGH_RISK_THRESHOLD)
+from premiums import premium_table
+from kidney_pipeline import kidney_model_columns
+from heart_numpy import heart_model_columns
+from diabetes_pipeline import DIABETES_FEATURES, diabetes_model_array, diabetes_model_inputs
+
+# Largest number of patient records accepted in one batch request
+MAX_BATCH_ROWS = 100000
+
+# Largest request body accepted, in bytes (the app's MAX_CONTENT_LENGTH);
+# override with CARDIALINK_MAX_REQUEST_BYTES
+MAX_REQUEST_BYTES = int(os.environ.get('CARDIALINK_MAX_REQUEST_BYTES', 128 * 1024 * 1024))
+
+# Largest number of risk scores priced in one quote request
+MAX_QUOTE_ROWS = 1000000
+
+# Records parsed together while a batch upload is read; a streamed (NDJSON)
+# upload never holds more than one chunk of records in memory
+BATCH_CHUNK_ROWS = 4096
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl')
+
+# Every field a combined assessment reads; shared fields such as age are
+# parsed once
+ASSESS_FIELDS = list(dict.fromkeys(HEART_SCHEMA.names + KIDNEY_SCHEMA.names + DIABETES_SCHEMA.names
+                                   + DIABETES_FEATURES))
+ASSESS_COLUMNS = {name: i for i, name in enumerate(ASSESS_FIELDS)}
+
+# Threads per process running the model calls of the API endpoints; bounds
+# the CPU-bound work in flight however many requests are open. Override with
+# CARDIALINK_SCORING_WORKERS
+SCORING_WORKERS = int(os.environ.get('CARDIALINK_SCORING_WORKERS', 3))
+
+# Origins (comma-separated) allowed to call the API from a browser, e.g. the
+# React frontend; none by default
+API_ALLOWED_ORIGINS = [origin.strip() for origin in os.environ.get('CARDIALINK_API_ORIGINS', '').split(',')
+                       if origin.strip()]
+
+
+def score_heart_batch(X, heart_model=None, model_version=None):
+    """
+    Score heart disease risk for rows in HEART_SCHEMA order.
+
+    With a model_version, model results are read from and added to the
+    result cache (see caching.py).
+    """
+    if heart_model is not None:
+        try:
+            # Pick the model's feature columns, in its order
+            columns = heart_model_columns(tuple(heart_model.feature_names))
+            return result_cache.predict('heart', model_version, X,
+                                        lambda rows: heart_model.predict_proba(rows[:, columns]))
+        except Exception as e:
+            print(f"Error making batch heart disease prediction: {e}")
+    return calculate_rule_based_heart_risk_batch(X)
+
+
+def score_kidney_batch(X, kidney_model=None, model_version=None):
+    """Score kidney disease risk for rows in KIDNEY_SCHEMA order."""
+    if kidney_model is not None:
+        try:
+            # Pick the model's training columns (every form field except sg)
+            columns = kidney_model_columns(tuple(kidney_model.feature_names))
+            return result_cache.predict('kidney', model_version, X,
+                                        lambda rows: kidney_model.predict_proba(rows[:, columns])[:, 1])
+        except Exception as e:
+            print(f"Error making batch kidney disease prediction: {e}")
+    return calculate_rule_based_kidney_risk_batch(X)
+
+
+def score_diabetes_batch(X, diabetes_model=None, model_X=None, model_version=None):
+    """
+    Score diabetes risk for rows in DIABETES_SCHEMA order.
+    
+    The model takes the BRFSS health indicators instead of the symptoms, so
+    it is only used when model_X (see diabetes_model_array) is given, and its
+    risk is blended with the rule-based score of the symptoms.
+    """
+    rule_risk = calculate_rule_based_diabetes_risk_batch(X)
+    if diabetes_model is not None and model_X is not None:
+        try:
+            model_risk = result_cache.predict('diabetes', model_version, model_X,
+                                              lambda rows: diabetes_model.predict_proba(rows)[:, 1])
+            return blend_diabetes_risk(model_risk, rule_risk)
+        except Exception as e:
+            print(f"Error making batch diabetes prediction: {e}")
+    return rule_risk
+
+
+_scoring_pool = None
+_scoring_pool_pid = None
+_scoring_pool_lock = threading.Lock()
+
+
+def scoring_pool():
+    """
+    Return the bounded thread pool the API runs its model calls on, creating
+    it on first use in each process (threads do not survive a fork).
+    """
+    global _scoring_pool, _scoring_pool_pid
+    with _scoring_pool_lock:
+        if _scoring_pool is None or _scoring_pool_pid != os.getpid():
+            _scoring_pool = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix='scoring')
+            _scoring_pool_pid = os.getpid()
+        return _scoring_pool
+
+
+def read_ndjson_records(stream):
+    """
+    Yield the records of a newline-delimited JSON upload as they arrive.
+
+    Raises:
+        ValueError: If a line is not a JSON object
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f'Line {line_number} is not valid JSON')
+        if not isinstance(record, dict):
+            raise ValueError(f'Line {line_number} is not a JSON object')
+        yield record
+
+
+def parse_batch(records, with_diabetes_model):
+    """
+    Parse batch records for all three diseases, BATCH_CHUNK_ROWS at a time.
+
+    Args:
+        records: Iterable of record mappings (a list or a stream)
+        with_diabetes_model: Also build the diabetes model inputs
+
+    Returns:
+        Tuple of (heart X, kidney X, diabetes X, diabetes model X or None),
+        or None if there are more than MAX_BATCH_ROWS records
+    """
+    parts = ([], [], [], [])
+    n_records = 0
+    records = iter(records)
+    while True:
+        chunk = [record for _, record in zip(range(BATCH_CHUNK_ROWS), records)]
+        n_records += len(chunk)
+        if n_records > MAX_BATCH_ROWS:
+            return None
+        parts[0].append(HEART_SCHEMA.parse_many(chunk))
+        parts[1].append(KIDNEY_SCHEMA.parse_many(chunk))
+        parts[2].append(DIABETES_SCHEMA.parse_many(chunk))
+        if with_diabetes_model:
+            parts[3].append(diabetes_model_array(chunk))
+        if len(chunk) < BATCH_CHUNK_ROWS:
+            break
+    heart_X, kidney_X, diabetes_X, model_X = (np.concatenate(part) if part else None for part in parts)
+    return heart_X, kidney_X, diabetes_X, model_X
+
+
+def assess_columns(raw, names):
+    """Return a copy of the named columns of an array of ASSESS_FIELDS."""
+    return raw[:, [ASSESS_COLUMNS[name] for name in names]]
+
+
+def wants_premium():
+    """True if the request asks for the premium tier (?premium=1)."""
+    return request.args.get('premium', '').lower() in ('1', 'true', 'yes')
+
+
+def premium_fields(risk_score):
+    """Return the premium tier and range of a risk score as JSON fields."""
+    risk_tier, min_premium, max_premium = calculate_insurance_premium(risk_score)
+    return {'risk_tier': risk_tier, 'min_premium': min_premium, 'max_premium': max_premium}
+
+
+def create_api_blueprint(model_registry):
+    """
+    Create the /api/v1 blueprint.
+
+    Args:
+        model_registry: ModelRegistry the endpoints take their models from
+    """
+    api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+    @api.after_request
+    def allow_origin(response):
+        # CORS for the allowed browser origins; preflight requests are
+        # answered by Flask's automatic OPTIONS handling
+        origin = request.headers.get('Origin')
+        if origin and origin in API_ALLOWED_ORIGINS:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+            response.vary.add('Origin')
+        return response
+
+    def score_one(schema, score_batch, model_name, model_fields=None):
+        # Score a single JSON record with the same functions as the batch API
+        record = request.get_json(silent=True)
+        if not isinstance(record, dict):
+            return jsonify({'error': 'Expected a JSON object of patient fields'}), 400
+        model = model_registry.get(model_name)
+        kwargs = {'model_version': model_registry.version(model_name)}
+        if model_fields is not None and model is not None:
+            kwargs['model_X'] = model_fields([record])
+        X = schema.parse_many([record])
+        risk_score = float(scoring_pool().submit(score_batch, X, model, **kwargs).result()[0])
+        result = {'disease': model_name, 'risk': risk_score}
+        if wants_premium():
+            result.update(premium_fields(risk_score))
+        return jsonify(result)
+
+    @api.route('/heart', methods=['POST'])
+    def score_heart():
+        return score_one(HEART_SCHEMA, score_heart_batch, 'heart')
+
+    @api.route('/kidney', methods=['POST'])
+    def score_kidney():
+        return score_one(KIDNEY_SCHEMA, score_kidney_batch, 'kidney')
+
+    @api.route('/diabetes', methods=['POST'])
+    def score_diabetes():
+        return score_one(DIABETES_SCHEMA, score_diabetes_batch, 'diabetes', diabetes_model_array)
+
+    @api.route('/score/batch', methods=['POST'])
+    def score_batch():
+        # Accept a bare JSON array, {"records": [...]}, or one JSON object per
+        # line (application/x-ndjson), which is parsed while it is uploaded
+        if request.mimetype in NDJSON_MIMETYPES:
+            records = read_ndjson_records(request.stream)
+        else:
+            payload = request.get_json(silent=True)
+            records = payload.get('records') if isinstance(payload, dict) else payload
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                return jsonify({'error': 'Expected a JSON array of patient records'}), 400
+        diabetes_model = model_registry.get('diabetes')
+        try:
+            parsed = parse_batch(records, diabetes_model is not None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if parsed is None:
+            return jsonify({'error': f'At most {MAX_BATCH_ROWS} records per request'}), 413
+        heart_X, kidney_X, diabetes_X, diabetes_model_X = parsed
+        if len(heart_X) == 0:
+            return jsonify({'count': 0, 'results': []})
+
+        # The model calls run on the bounded scoring pool, concurrently
+        pool = scoring_pool()
+        heart_future = pool.submit(score_heart_batch, heart_X, model_registry.get('heart'))
+        kidney_future = pool.submit(score_kidney_batch, kidney_X, model_registry.get('kidney'))
+        diabetes_future = pool.submit(score_diabetes_batch, diabetes_X, diabetes_model, diabetes_model_X)
+        heart_risk = heart_future.result()
+        kidney_risk = kidney_future.result()
+        diabetes_risk = diabetes_future.result()
+        combined_risk = combine_risks(heart_risk, kidney_risk, diabetes_risk)
+        # Every patient is priced in one vectorized pass
+        quotes = premium_table.quote(combined_risk)
+
+        columns = zip(np.asarray(heart_risk).tolist(), np.asarray(kidney_risk).tolist(),
+                      np.asarray(diabetes_risk).tolist(), combined_risk.tolist(), quotes['risk_tier'].tolist(),
+                      quotes['min_premium'].tolist(), quotes['max_premium'].tolist())
+        results = [{
+            'heart_risk': heart,
+            'kidney_risk': kidney,
+            'diabetes_risk': diabetes,
+            'combined_risk': combined,
+            'risk_tier': risk_tier,
+            'min_premium': min_premium,
+            'max_premium': max_premium,
+        } for heart, kidney, diabetes, combined, risk_tier, min_premium, max_premium in columns]
+        return jsonify({'count': len(results), 'results': results})
+
+    @api.route('/quote/batch', methods=['POST'])
+    def quote_batch():
+        # Price risk scores given as a bare JSON array or as
+        # {"risks": [...], "interpolate": true}; the quotes are returned as
+        # one array per field, in the order of the risks
+        payload = request.get_json(silent=True)
+        risks = payload.get('risks') if isinstance(payload, dict) else payload
+        interpolate = payload.get('interpolate', False) if isinstance(payload, dict) else False
+        if not isinstance(risks, list):
+            return jsonify({'error': 'Expected a JSON array of risk scores'}), 400
+        if not isinstance(interpolate, bool):
+            return jsonify({'error': 'interpolate must be true or false'}), 400
+        if len(risks) > MAX_QUOTE_ROWS:
+            return jsonify({'error': f'At most {MAX_QUOTE_ROWS} risk scores per request'}), 413
+        # JSON numbers only: NumPy would also convert strings, booleans and null
+        if not set(map(type, risks)) <= {int, float}:
+            return jsonify({'error': 'Risk scores must be numbers'}), 400
+        try:
+            risk_scores = np.array(risks, dtype=np.float64)
+        except OverflowError:
+            return jsonify({'error': 'Risk scores must be between 0 and 1'}), 400
+        if not np.all((risk_scores >= 0.0) & (risk_scores <= 1.0)):
+            return jsonify({'error': 'Risk scores must be between 0 and 1'}), 400
+
+        quotes = premium_table.quote(risk_scores, interpolate=interpolate)
+        result = {'count': len(risk_scores)}
+        for field in ('risk_tier', 'min_premium', 'max_premium', 'premium'):
+            if field in quotes:
+                result[field] = quotes[field].tolist()
+        return jsonify(result)
+
+    @api.route('/assess', methods=['POST'])
+    def assess():
+        # Score one applicant for all three diseases from a single JSON object
+        # holding the heart, kidney and diabetes fields; each field is read once
+        start = time.perf_counter()
+        record = request.get_json(silent=True)
+        if not isinstance(record, dict):
+            return jsonify({'error': 'Expected a JSON object of patient fields'}), 400
+        raw = read_fields([record], ASSESS_FIELDS)
+
+        def score(name, schema, score_batch, model_rows=None):
+            disease_start = time.perf_counter()
+            model = model_registry.get(name)
+            kwargs = {'model_version': model_registry.version(name)}
+            if model_rows is not None and model is not None:
+                kwargs['model_X'] = model_rows()
+            X = schema.validate(assess_columns(raw, schema.names))
+            risk_score = float(score_batch(X, model, **kwargs)[0])
+            metrics.observe(f'assess.{name}_ms', (time.perf_counter() - disease_start) * 1000.0, LATENCY_MS_BOUNDS)
+            return risk_score
+
+        # The three diseases are scored concurrently; the model calls release the GIL
+        pool = scoring_pool()
+        heart_future = pool.submit(score, 'heart', HEART_SCHEMA, score_heart_batch)
+        kidney_future = pool.submit(score, 'kidney', KIDNEY_SCHEMA, score_kidney_batch)
+        diabetes_future = pool.submit(score, 'diabetes', DIABETES_SCHEMA, score_diabetes_batch,
+                                      lambda: diabetes_model_inputs(assess_columns(raw, DIABETES_FEATURES),
+                                                                    *assess_columns(raw, ['age', 'gender']).T))
+        heart_risk = heart_future.result()
+        kidney_risk = kidney_future.result()
+        diabetes_risk = diabetes_future.result()
+
+        # Same combination as combined_results(): weighted mean, raised to at
+        # least HIGH_RISK_FLOOR if heart or kidney risk exceeds HIGH_RISK_THRESHOLD
+        combined_risk = float(combine_risks(heart_risk, kidney_risk, diabetes_risk))
+        result = {
+            'heart_risk': heart_risk,
+            'kidney_risk': kidney_risk,
+            'diabetes_risk': diabetes_risk,
+            'combined_risk': combined_risk,
+            'high_risk_override': heart_risk > HIGH_RISK_THRESHOLD or kidney_risk > HIGH_RISK_THRESHOLD,
+        }
+        result.update(premium_fields(combined_risk))
+        metrics.observe('assess.total_ms', (time.perf_counter() - start) * 1000.0, LATENCY_MS_BOUNDS)
+        return jsonify(result)
+
+    return api
@@ -0,0 +1,117 @@
+"""
+Content-addressed storage for trained model artifacts.
+
+An artifact's key is a hash of the training data plus the hyperparameters
+used to fit it, so a model only has to be retrained when one of them changes.
+
+Models that are served from NumPy arrays are stored as array bundles: a
+directory with one uncompressed .npy file per array plus a meta.json. Bundles
+are opened with np.load(mmap_mode='r'), so every worker process on a host
+maps the same read-only pages from the page cache instead of holding its own
+private copy of the model.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+from joblib import dump, load
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_DIR = os.path.join(MODEL_DIR, 'artifacts')
+
+
+def artifact_key(data_paths, params):
+    """
+    Compute the content hash identifying an artifact.
+    
+    Args:
+        data_paths: Files the model is trained from
+        params: JSON-serialisable dict of hyperparameters
+    
+    Returns:
+        Short hex digest
+    """
+    digest = hashlib.sha256()
+    for path in data_paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(name, key, ext='joblib'):
+    """Return the path of the artifact for the given model name and key."""
+    return os.path.join(ARTIFACT_DIR, f"{name}-{key}.{ext}")
+
+
+def save_artifact(obj, path):
+    """
+    Write an artifact atomically, so a concurrently starting worker never
+    sees a half-written file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_artifact(path):
+    """Load an artifact written by save_artifact."""
+    return load(path)
+
+
+def bundle_path(name, key):
+    """Return the directory of the array bundle for the given model name and key."""
+    return os.path.join(ARTIFACT_DIR, f"{name}-{key}")
+
+
+def save_array_bundle(path, arrays, meta=None):
+    """
+    Write a dict of arrays as a memory-mappable bundle directory.
+    
+    The bundle is written to a temporary directory and renamed into place.
+    Bundles are content-addressed, so if another process got there first the
+    existing bundle is kept.
+    
+    Args:
+        path: Bundle directory
+        arrays: Dict of name -> array
+        meta: Optional JSON-serialisable dict stored in meta.json
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        # C-contiguous so the file can be mapped without copying
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump({'arrays': sorted(arrays), **(meta or {})}, f)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+def open_array_bundle(path, mmap=True):
+    """
+    Open a bundle written by save_array_bundle.
+    
+    Returns:
+        Tuple of (arrays, meta); with mmap=True the arrays are read-only
+        memory maps backed by the page cache
+    """
+    with open(os.path.join(path, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in meta['arrays']
+    }
+    return arrays, meta
@@ -0,0 +1,72 @@
+"""
+Fingerprinted static assets.
+
+Files under static/ are served from memory under a name that includes a hash
+of their contents (css/base.css becomes /assets/css/base.<hash>.css), with
+Cache-Control: immutable. A changed file gets a new URL, so browsers can
+cache every version forever and only ever download a stylesheet once.
+Templates link to the current version with asset_url('css/base.css').
+"""
+import hashlib
+import mimetypes
+import os
+
+from flask import abort
+
+from pages import PrerenderedPage
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_URL_PREFIX = '/assets'
+
+# One year, the longest lifetime caches honour
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def fingerprint(name, body):
+    """Return name with a hash of body inserted before the extension."""
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+
+
+class AssetManifest:
+    """The static files, keyed by their fingerprinted names."""
+
+    def __init__(self, directory=STATIC_DIR, url_prefix=ASSET_URL_PREFIX):
+        self.url_prefix = url_prefix
+        self.urls = {}
+        self.files = {}
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    body = f.read()
+                hashed_name = fingerprint(name, body)
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                self.files[hashed_name] = PrerenderedPage(body, mimetype, ASSET_CACHE_CONTROL)
+                self.urls[name] = f"{url_prefix}/{hashed_name}"
+
+    def url(self, name):
+        """Return the fingerprinted URL of a static file, e.g. 'css/base.css'."""
+        return self.urls[name]
+
+
+def register_assets(app, directory=STATIC_DIR):
+    """
+    Serve the files in directory under fingerprinted URLs and make
+    asset_url() available to the templates.
+
+    Returns:
+        AssetManifest
+    """
+    manifest = AssetManifest(directory)
+
+    @app.route(f'{manifest.url_prefix}/<path:filename>', methods=['GET'])
+    def asset(filename):
+        page = manifest.files.get(filename)
+        if page is None:
+            abort(404)
+        return page.response()
+
+    app.jinja_env.globals['asset_url'] = manifest.url
+    return manifest
@@ -0,0 +1,131 @@
+"""
+Micro-batching of model inference requests.
+
+Concurrent requests that each need a prediction for one row hand their row to
+a MicroBatcher. A background thread collects the pending rows for a short
+window (or until the batch is full), runs one batched model call, and hands
+each result back to the request waiting for it. This replaces many
+single-row calls, whose fixed per-call overhead dominates, with a few
+batched ones.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from metrics import metrics, LATENCY_MS_BOUNDS
+
+# Defaults; override with CARDIALINK_BATCH_WINDOW_MS / CARDIALINK_MAX_BATCH_SIZE /
+# CARDIALINK_BATCH_TIMEOUT_MS
+BATCH_WINDOW_MS = float(os.environ.get('CARDIALINK_BATCH_WINDOW_MS', 2.0))
+MAX_BATCH_SIZE = int(os.environ.get('CARDIALINK_MAX_BATCH_SIZE', 64))
+# Longest a request waits for its result before giving up on the model
+BATCH_TIMEOUT_MS = float(os.environ.get('CARDIALINK_BATCH_TIMEOUT_MS', 1000.0))
+
+
+class MicroBatcher:
+    """
+    Coalesces single-row predictions into batched model calls.
+
+    Metrics (see metrics.py), prefixed with 'batcher.<name>.':
+        queue_depth: rows waiting when a row is submitted
+        batch_size: rows per model call
+        wait_ms: time from submitting a row to receiving its result
+    """
+
+    def __init__(self, name, predict_fn, max_batch_size=MAX_BATCH_SIZE, window_ms=BATCH_WINDOW_MS):
+        """
+        Args:
+            name: Name used in the metrics
+            predict_fn: Function mapping an (n_rows, n_features) array to n_rows results
+            max_batch_size: Most rows passed to one predict_fn call
+            window_ms: Longest time the first row of a batch waits for others
+        """
+        self.name = name
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _worker_alive(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_worker(self):
+        # The worker thread is started lazily, and again after a fork, since
+        # threads do not survive into forked worker processes, or if it died
+        if self._worker_alive():
+            return
+        with self._lock:
+            if not self._worker_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def submit(self, row, timeout=BATCH_TIMEOUT_MS / 1000.0):
+        """
+        Predict one row, batched together with concurrent callers.
+
+        Blocks until the result is available and returns it; exceptions
+        raised by predict_fn are re-raised here.
+
+        Raises:
+            concurrent.futures.TimeoutError: If no result arrived within
+                timeout seconds (None waits forever); the row is dropped
+                if the model has not started on it yet
+        """
+        self._ensure_worker()
+        start = time.perf_counter()
+        future = Future()
+        metrics.observe(f'batcher.{self.name}.queue_depth', self._queue.qsize())
+        self._queue.put((row, future))
+        try:
+            result = future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+        metrics.observe(f'batcher.{self.name}.wait_ms', (time.perf_counter() - start) * 1000.0,
+                        LATENCY_MS_BOUNDS)
+        return result
+
+    def _collect(self):
+        # Block for the first row, then gather more until the window closes
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed, but still take rows that are already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Skip rows whose caller already timed out
+            batch = [(row, future) for row, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            metrics.observe(f'batcher.{self.name}.batch_size', len(batch))
+            try:
+                results = list(self.predict_fn(np.asarray([row for row, _ in batch], dtype=np.float64)))
+                if len(results) != len(batch):
+                    raise ValueError(f"predict_fn returned {len(results)} results for {len(batch)} rows")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                # Whatever failed, no caller is left waiting on an unset result
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
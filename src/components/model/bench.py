@@ -0,0 +1,168 @@
+"""
+Micro-benchmarks for the serving hot paths.
+
+    python bench.py forest --rows 10000
+    python bench.py diabetes --rows 50000
+    python bench.py templates
+    python bench.py lookup --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+
+def best_of(func, repeat=5):
+    """Return the fastest of several runs of func, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_forest(args):
+    """Compare the compiled kidney forest with sklearn's predict_proba."""
+    from kidney_pipeline import load_kidney_artifact, load_kidney_sklearn_model, load_kidney_training_data
+    from forest import check_forest
+    
+    forest = load_kidney_artifact()
+    model = load_kidney_sklearn_model()
+    X_train, _ = load_kidney_training_data()
+    
+    # Resample the training rows with noise to get a realistic batch
+    rng = np.random.default_rng(0)
+    base = X_train.to_numpy(dtype=np.float64)
+    X = base[rng.integers(0, len(base), args.rows)] * rng.uniform(0.8, 1.2, (args.rows, base.shape[1]))
+    X_df = X_train.iloc[:0].reindex(range(args.rows))
+    X_df[:] = X
+    
+    check_forest(model, forest, X_df)
+    sklearn_time = best_of(lambda: model.predict_proba(X_df), args.repeat)
+    forest_time = best_of(lambda: forest.predict_proba(X), args.repeat)
+    single_row = X[:1]
+    sklearn_single = best_of(lambda: model.predict_proba(X_df.iloc[:1]), args.repeat)
+    forest_single = best_of(lambda: forest.predict_proba(single_row), args.repeat)
+    
+    print(f"Kidney forest, {args.rows} rows ({forest.n_estimators} trees), outputs identical")
+    print(f"  sklearn predict_proba: {sklearn_time * 1e3:8.2f} ms   single row: {sklearn_single * 1e6:8.1f} us")
+    print(f"  FlatForest:            {forest_time * 1e3:8.2f} ms   single row: {forest_single * 1e6:8.1f} us")
+    print(f"  speedup:               {sklearn_time / forest_time:8.2f}x             {sklearn_single / forest_single:8.2f}x")
+
+
+def bench_diabetes(args):
+    """
+    Compare the m script's training path (StandardScaler + GradientBoosting
+    on float64) with the HistGradientBoosting pipeline on compact integers.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from diabetes_pipeline import DIABETES_FEATURES, DIABETES_PARAMS, generate_brfss_like
+    
+    X, y = generate_brfss_like(args.rows, DIABETES_PARAMS['seed'])
+    X_train, X_test, y_train, y_test = train_test_split(X[DIABETES_FEATURES].to_numpy(), y.to_numpy(),
+                                                        test_size=0.3, random_state=42)
+    X_train_float = X_train.astype(np.float64)
+    
+    models = {
+        'GradientBoosting (m script)': (make_pipeline(StandardScaler(), GradientBoostingClassifier()),
+                                        X_train_float),
+        'HistGradientBoosting (int8)': (HistGradientBoostingClassifier(
+            max_iter=DIABETES_PARAMS['max_iter'], learning_rate=DIABETES_PARAMS['learning_rate'],
+            max_leaf_nodes=DIABETES_PARAMS['max_leaf_nodes'],
+            random_state=DIABETES_PARAMS['random_state']), X_train),
+    }
+    
+    print(f"Diabetes models, {args.rows} synthetic BRFSS-shaped rows "
+          f"(training data {X_train.nbytes / 1e6:.1f} MB as int8, {X_train_float.nbytes / 1e6:.1f} MB as float64)")
+    batch = X_test[:args.batch].astype(np.float64)
+    single_row = batch[:1]
+    for name, (model, X_fit) in models.items():
+        start = time.perf_counter()
+        model.fit(X_fit, y_train)
+        train_time = time.perf_counter() - start
+        auc = roc_auc_score(y_test, model.predict_proba(X_test.astype(np.float64))[:, 1])
+        batch_time = best_of(lambda: model.predict_proba(batch), args.repeat)
+        single_time = best_of(lambda: model.predict_proba(single_row), args.repeat)
+        print(f"  {name:28s} train: {train_time:7.2f} s   AUC: {auc:.3f}   "
+              f"{len(batch)} rows: {batch_time * 1e3:7.2f} ms   single row: {single_time * 1e6:8.1f} us")
+
+
+def bench_templates(args):
+    """Compare render_template_string with the cached, loader-backed templates."""
+    import os
+    from flask import render_template, render_template_string
+    from predict import app
+    
+    pages = {
+        'base.html': {'content': '<section><h1>Form</h1></section>', 'active_tab': 'heart'},
+        'results.html': {'active_tab': 'results', 'heart_risk': 0.3, 'kidney_risk': 0.2,
+                         'diabetes_risk': 0.1, 'combined_risk': 0.23, 'risk_tier': 'Low-Medium',
+                         'min_premium': 5000, 'max_premium': 8000},
+    }
+    print("Template rendering, per render")
+    with app.test_request_context():
+        for name, context in pages.items():
+            with open(os.path.join(app.root_path, app.template_folder, name), 'r') as f:
+                source = f.read()
+            string_time = best_of(lambda: render_template_string(source, **context), args.repeat)
+            cached_time = best_of(lambda: render_template(name, **context), args.repeat)
+            print(f"  {name:14s} render_template_string: {string_time * 1e3:7.3f} ms   "
+                  f"render_template: {cached_time * 1e3:7.3f} ms   speedup: {string_time / cached_time:6.1f}x")
+
+
+def bench_lookup(args):
+    """Compare the diabetes rule kernel with its precomputed lookup table."""
+    from rules import diabetes_kernel, diabetes_lookup
+    
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 2, (args.rows, len(diabetes_kernel.fields))).astype(np.float64)
+    X[:, diabetes_kernel.fields.index('age')] = rng.uniform(18, 90, args.rows)
+    if not np.array_equal(diabetes_kernel(X), diabetes_lookup(X)):
+        raise AssertionError("Lookup table scores differ from the rule kernel")
+    kernel_time = best_of(lambda: diabetes_kernel(X), args.repeat)
+    lookup_time = best_of(lambda: diabetes_lookup(X), args.repeat)
+    row = X[0].tolist()
+    kernel_single = best_of(lambda: diabetes_kernel.score_one(row), args.repeat)
+    lookup_single = best_of(lambda: diabetes_lookup.score_one(row), args.repeat)
+    
+    print(f"Diabetes rule scorer, {args.rows} rows ({len(diabetes_lookup.table)} table entries), outputs identical")
+    print(f"  RuleKernel:   {kernel_time * 1e3:8.2f} ms   single row: {kernel_single * 1e6:8.1f} us")
+    print(f"  LookupKernel: {lookup_time * 1e3:8.2f} ms   single row: {lookup_single * 1e6:8.1f} us")
+    print(f"  speedup:      {kernel_time / lookup_time:8.2f}x             {kernel_single / lookup_single:8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CardiaLink serving benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    forest_parser = subparsers.add_parser('forest', help="compiled kidney forest vs sklearn")
+    forest_parser.add_argument('--rows', type=int, default=10000)
+    forest_parser.add_argument('--repeat', type=int, default=5)
+    forest_parser.set_defaults(func=bench_forest)
+    
+    diabetes_parser = subparsers.add_parser('diabetes', help="HistGradientBoosting vs the m script's GradientBoosting")
+    diabetes_parser.add_argument('--rows', type=int, default=50000)
+    diabetes_parser.add_argument('--batch', type=int, default=1000)
+    diabetes_parser.add_argument('--repeat', type=int, default=5)
+    diabetes_parser.set_defaults(func=bench_diabetes)
+    
+    templates_parser = subparsers.add_parser('templates', help="cached templates vs render_template_string")
+    templates_parser.add_argument('--repeat', type=int, default=20)
+    templates_parser.set_defaults(func=bench_templates)
+    
+    lookup_parser = subparsers.add_parser('lookup', help="diabetes rule kernel vs its lookup table")
+    lookup_parser.add_argument('--rows', type=int, default=1000000)
+    lookup_parser.add_argument('--repeat', type=int, default=5)
+    lookup_parser.set_defaults(func=bench_lookup)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
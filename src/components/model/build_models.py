@@ -0,0 +1,51 @@
+"""
+Build step for the model artifacts served by predict.py.
+
+Run once after changing the training data or hyperparameters, and after the
+v script has retrained the heart disease network:
+
+    python build_models.py
+
+Artifacts are content-addressed, so unchanged models are not retrained.
+"""
+import argparse
+import os
+
+from kidney_pipeline import build_kidney_artifact
+from diabetes_pipeline import DIABETES_CSV, build_diabetes_artifact
+from heart_numpy import HEART_H5, export_heart_npz, build_heart_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and save CardiaLink model artifacts")
+    parser.add_argument('--force', action='store_true', help="retrain even if an up-to-date artifact exists")
+    parser.add_argument('--no-templates', action='store_true', help="skip precompiling the page templates")
+    args = parser.parse_args()
+    
+    path = build_kidney_artifact(force=args.force)
+    print(f"Kidney model bundle: {path}")
+    
+    path = build_diabetes_artifact(force=args.force)
+    print(f"Diabetes model artifact: {path}")
+    if not os.path.exists(DIABETES_CSV):
+        print("The diabetes model was trained on synthetic data and is not served by the app")
+    
+    # Exporting the heart network is the only step that needs TensorFlow
+    if os.path.exists(HEART_H5):
+        path = export_heart_npz()
+        print(f"Heart model artifact: {path}")
+        print(f"Heart model bundle: {build_heart_bundle(path)}")
+    else:
+        print(f"Skipping heart model export: {HEART_H5} not found (run the v script first)")
+    
+    # Optional: write the templates' compiled bytecode, so workers do not
+    # compile them on their first render
+    if not args.no_templates:
+        from predict import app
+        from templating import precompile_templates
+        names = precompile_templates(app)
+        print(f"Precompiled templates: {', '.join(names)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Canonical feature keys and the per-process cache of model results.
+
+Features are quantized to QUANTIZE_DECIMALS decimals, so the same patient
+submitted twice (or a retried request) maps to the same key even if a value
+went through a float round-trip. feature_hash() turns quantized rows into
+64-bit hashes; it is used for the deterministic jitter of the rule-based
+scorers and has a scalar form, feature_hash_one(), that gives the same value.
+
+ResultCache holds model predictions keyed on (disease, model version,
+quantized features), so a resubmission skips inference entirely. Entries
+expire after a time-to-live and the least recently used entries are evicted
+beyond the size bound. Behind this per-process LRU sits a table shared by
+all worker processes on the host (see shared_cache.py), keyed on a 64-bit
+hash of the same key, so a patient scored by one worker is a hit in the
+others. Hits, misses, expirations and evictions are counted in the metrics
+registry.
+"""
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import metrics
+from shared_cache import SharedResultTable
+
+# Features are compared at this precision (specific gravity has 3 decimals)
+QUANTIZE_DECIMALS = 3
+_SCALE = 10.0 ** QUANTIZE_DECIMALS
+# Bound (exact as a float) that quantized values are clipped to, and the
+# quantized value of NaN and infinities
+_LIMIT = float(1 << 62)
+_NOT_FINITE = -(1 << 63)
+
+# Defaults; override with CARDIALINK_RESULT_CACHE_SIZE (0 disables the cache)
+# / CARDIALINK_RESULT_CACHE_TTL (seconds)
+RESULT_CACHE_SIZE = int(os.environ.get('CARDIALINK_RESULT_CACHE_SIZE', 4096))
+RESULT_CACHE_TTL = float(os.environ.get('CARDIALINK_RESULT_CACHE_TTL', 600))
+# Slots of the table shared by all workers (32 bytes each); override with
+# CARDIALINK_SHARED_CACHE_SLOTS (0 disables the shared table)
+SHARED_CACHE_SLOTS = int(os.environ.get('CARDIALINK_SHARED_CACHE_SLOTS', 65536))
+
+_MASK = (1 << 64) - 1
+# FNV-1a over 64-bit words, then the splitmix64 finalizer
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MIX_1 = 0xbf58476d1ce4e5b9
+_MIX_2 = 0x94d049bb133111eb
+# Arrays of up to this many rows are hashed row by row in Python
+_SCALAR_HASH_ROWS = 8
+
+
+def hash_seed(name):
+    """Return a hash seed derived from a name, e.g. the disease."""
+    return zlib.crc32(name.encode('utf-8'))
+
+
+def quantize(X):
+    """
+    Quantize an (n_rows, n_features) array of features.
+
+    Returns:
+        int64 array of the same shape
+    """
+    X = np.asarray(X, dtype=np.float64)
+    scaled = np.rint(np.clip(X * _SCALE, -_LIMIT, _LIMIT))
+    return np.where(np.isfinite(X), scaled, _NOT_FINITE).astype(np.int64)
+
+
+def quantize_one(features):
+    """Scalar quantize() of one row of features, as a tuple of ints."""
+    # Fast path for the usual finite, in-range values; round() raises on NaN
+    # and infinities
+    try:
+        quantized = [round(x * _SCALE) for x in map(float, features)]
+    except (ValueError, OverflowError):
+        quantized = None
+    if quantized and -_LIMIT <= min(quantized) and max(quantized) <= _LIMIT:
+        return tuple(quantized)
+    quantized = []
+    for x in features:
+        x = float(x)
+        if math.isfinite(x):
+            quantized.append(round(max(-_LIMIT, min(_LIMIT, x * _SCALE))))
+        else:
+            quantized.append(_NOT_FINITE)
+    return tuple(quantized)
+
+
+def feature_hash(Q, seed=0):
+    """
+    Hash each row of a quantized array.
+
+    Args:
+        Q: int64 array of shape (n_rows, n_features) from quantize()
+        seed: Integer mixed into every hash
+
+    Returns:
+        uint64 array of n_rows hashes
+    """
+    if len(Q) <= _SCALAR_HASH_ROWS:
+        # A few rows are hashed faster in Python than by two ufuncs per column
+        return np.array([feature_hash_one(row, seed) for row in np.asarray(Q).tolist()], dtype=np.uint64)
+    words = np.ascontiguousarray(Q, dtype=np.int64).view(np.uint64)
+    h = np.full(len(words), (_FNV_OFFSET ^ seed) & _MASK, dtype=np.uint64)
+    prime = np.uint64(_FNV_PRIME)
+    for j in range(words.shape[1]):
+        h ^= words[:, j]
+        h *= prime
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(_MIX_1)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(_MIX_2)
+    h ^= h >> np.uint64(31)
+    return h
+
+
+def feature_hash_one(quantized, seed=0):
+    """Scalar feature_hash() of one row from quantize_one()."""
+    h = (_FNV_OFFSET ^ seed) & _MASK
+    for q in quantized:
+        h = ((h ^ (q & _MASK)) * _FNV_PRIME) & _MASK
+    h ^= h >> 30
+    h = (h * _MIX_1) & _MASK
+    h ^= h >> 27
+    h = (h * _MIX_2) & _MASK
+    h ^= h >> 31
+    return h
+
+
+def hash_to_unit(h):
+    """Map 64-bit hashes (an int or a uint64 array) to floats in [0, 1)."""
+    if isinstance(h, np.ndarray):
+        return (h >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+    return (h >> 11) * 2.0 ** -53
+
+
+class ResultCache:
+    """Thread-safe LRU cache of model results with a time-to-live."""
+
+    def __init__(self, name, max_entries=RESULT_CACHE_SIZE, ttl_seconds=RESULT_CACHE_TTL, shared=None):
+        """
+        Args:
+            name: Name used in the metrics
+            max_entries: Size bound of the per-process LRU
+            ttl_seconds: Time-to-live of an entry
+            shared: Optional SharedResultTable consulted on local misses
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._lock = threading.Lock()
+        # key -> (result, expiry time), least recently used first
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def predict(self, disease, version, X, predict_fn):
+        """
+        Return predict_fn(X), calling it only for the rows not in the cache.
+
+        Args:
+            disease: Name of the disease (part of the key)
+            version: Version of the model that predict_fn runs; None bypasses
+                     the cache
+            X: Array of shape (n_rows, n_features) the key is built from
+            predict_fn: Called with the rows of X that missed; returns one
+                        result per row
+
+        Returns:
+            Array of n_rows results
+        """
+        X = np.atleast_2d(X)
+        if version is None or self.max_entries <= 0:
+            return np.asarray(predict_fn(X), dtype=np.float64).reshape(-1)
+
+        Q = quantize(X)
+        keys = [(disease, version, row) for row in map(tuple, Q.tolist())]
+        results = np.empty(len(keys), dtype=np.float64)
+        missing = []
+        expired = 0
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    results[i] = entry[0]
+                    continue
+                if entry is not None:
+                    del self._entries[key]
+                    expired += 1
+                missing.append(i)
+        metrics.inc(f'cache.{self.name}.hits', len(keys) - len(missing))
+        if expired:
+            metrics.inc(f'cache.{self.name}.expired', expired)
+        if not missing:
+            return results
+
+        # Local misses are looked up in the table shared with the other workers
+        shared_hashes = None
+        computed = missing
+        if self.shared is not None:
+            # Zero marks an empty slot, so it is never used as a key hash
+            shared_hashes = feature_hash(Q[missing], hash_seed(f'{disease}/{version}')) | np.uint64(1)
+            found, values = self.shared.get_many(shared_hashes)
+            results[np.asarray(missing)[found]] = values[found]
+            metrics.inc(f'cache.{self.name}.shared_hits', int(np.count_nonzero(found)))
+            computed = [i for i, hit in zip(missing, found.tolist()) if not hit]
+            shared_hashes = shared_hashes[~found]
+        metrics.inc(f'cache.{self.name}.misses', len(computed))
+
+        if computed:
+            results[computed] = np.asarray(predict_fn(X[computed]), dtype=np.float64).reshape(-1)
+            if self.shared is not None:
+                shared_evicted = self.shared.put_many(shared_hashes, results[computed])
+                if shared_evicted:
+                    metrics.inc(f'cache.{self.name}.shared_evictions', shared_evicted)
+        expires = time.monotonic() + self.ttl_seconds
+        evicted = 0
+        with self._lock:
+            for i in missing:
+                self._entries[keys[i]] = (float(results[i]), expires)
+                self._entries.move_to_end(keys[i])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.inc(f'cache.{self.name}.evictions', evicted)
+        return results
+
+
+# Model results, shared by the form routes and the JSON API. The shared table
+# is created here, at import time, so that it exists before serve.py forks
+result_cache = ResultCache('results', shared=SharedResultTable(SHARED_CACHE_SLOTS, RESULT_CACHE_TTL)
+                           if SHARED_CACHE_SLOTS > 0 else None)
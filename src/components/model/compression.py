@@ -0,0 +1,87 @@
+"""
+gzip compression of responses, negotiated through Accept-Encoding.
+
+register_compression() compresses HTML, CSS and JSON responses of at least
+GZIP_MIN_SIZE bytes for clients that accept gzip. Pre-rendered pages and
+static assets (see pages.py) carry a gzip copy made once at startup, which
+is served as is. Bytes in and out, the compression ratio and the CPU time
+spent compressing are recorded per route in metrics.py.
+"""
+import os
+import time
+import zlib
+
+from flask import request
+
+from metrics import metrics
+
+# Defaults; override with CARDIALINK_GZIP_LEVEL (1-9) / CARDIALINK_GZIP_MIN_SIZE
+GZIP_LEVEL = int(os.environ.get('CARDIALINK_GZIP_LEVEL', 6))
+GZIP_MIN_SIZE = int(os.environ.get('CARDIALINK_GZIP_MIN_SIZE', 1024))
+
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'application/json', 'application/javascript'}
+
+# Histogram bounds for the compression ratio and the CPU time
+RATIO_BOUNDS = [1, 1.5, 2, 3, 4, 6, 8, 12, 16]
+CPU_US_BOUNDS = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384]
+
+
+def gzip_compress(body, level=GZIP_LEVEL):
+    """Compress bytes into the gzip format."""
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer instead of zlib's
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def accepts_gzip():
+    """True if the current request's Accept-Encoding allows gzip."""
+    return request.accept_encodings['gzip'] > 0
+
+
+def record_compression(bytes_in, bytes_out, cpu_seconds=None):
+    """Record one compressed response of the current request's route."""
+    prefix = f'compression.{request.endpoint}'
+    metrics.inc(f'{prefix}.responses')
+    metrics.inc(f'{prefix}.bytes_in', bytes_in)
+    metrics.inc(f'{prefix}.bytes_out', bytes_out)
+    metrics.observe(f'{prefix}.ratio', bytes_in / max(bytes_out, 1), RATIO_BOUNDS)
+    if cpu_seconds is None:
+        # Served from a copy compressed at startup
+        metrics.inc(f'{prefix}.precompressed')
+    else:
+        metrics.observe(f'{prefix}.cpu_us', cpu_seconds * 1e6, CPU_US_BOUNDS)
+
+
+def register_compression(app, level=GZIP_LEVEL, min_size=GZIP_MIN_SIZE):
+    """
+    Compress the app's responses for clients that accept gzip.
+
+    Args:
+        app: Flask app
+        level: zlib compression level, 1 (fastest) to 9 (smallest)
+        min_size: Responses smaller than this many bytes are sent as is
+    """
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+        if not accepts_gzip():
+            return response
+
+        start = time.thread_time()
+        compressed = gzip_compress(body, level)
+        cpu_seconds = time.thread_time() - start
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+        # A strong ETag must differ between the identity and gzip encodings
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-gzip")
+        record_compression(len(body), len(compressed), cpu_seconds)
+        return response
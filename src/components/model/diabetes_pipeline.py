@@ -0,0 +1,269 @@
+"""
+Diabetes model training pipeline.
+
+Trains the model served by the /diabetes route on the BRFSS 2015 diabetes
+health indicators (the 21 features of the m script). The m script fits a
+GradientBoostingClassifier on StandardScaler-ed float64 data, which takes
+minutes on the 250k-row file. This pipeline keeps every column in the
+smallest integer dtype that holds it (all BRFSS indicators are small integer
+codes) and fits a HistGradientBoostingClassifier, which bins each feature
+once and then trains on the bins. Tree models do not need scaling, so there
+is no scaler to ship either.
+
+The BRFSS file is not part of the repo. When it is missing, a synthetic data
+set with the same columns, value ranges and roughly the same marginals and
+prevalence is generated instead, so the model can be built and benchmarked
+offline. A model trained on synthetic data is only a stand-in for the real
+one: build_models.py and bench.py use it, but the app never serves it.
+"""
+import os
+
+import numpy as np
+
+from artifacts import MODEL_DIR, artifact_key, artifact_path, save_artifact, load_artifact
+from features import Field, FieldSchema, read_fields
+
+DIABETES_CSV = os.path.join(MODEL_DIR, 'diabetes_binary_health_indicators_BRFSS2015.csv')
+
+# Features in the column order of the BRFSS file
+DIABETES_FEATURES = ['HighBP', 'HighChol', 'CholCheck', 'BMI', 'Smoker',
+                     'Stroke', 'HeartDiseaseorAttack', 'PhysActivity',
+                     'Fruits', 'Veggies', 'HvyAlcoholConsump', 'AnyHealthcare',
+                     'NoDocbcCost', 'GenHlth', 'MentHlth', 'PhysHlth',
+                     'DiffWalk', 'Sex', 'Age', 'Education', 'Income']
+# Every indicator fits in int8, BMI (at most 98) included. Keeping a single
+# dtype matters: mixing int8 and uint8 columns would upcast the training
+# array to int16.
+DIABETES_DTYPES = {name: np.int8 for name in DIABETES_FEATURES}
+
+# Model input fields: defaults for indicators a request does not provide
+# (the most common answers in BRFSS 2015), and the valid codes of each
+_FLAG = (0, 1, 'int')
+DIABETES_MODEL_SCHEMA = FieldSchema([
+    Field('HighBP', 0, *_FLAG), Field('HighChol', 0, *_FLAG), Field('CholCheck', 1, *_FLAG),
+    Field('BMI', 27, 12, 98, 'int'), Field('Smoker', 0, *_FLAG), Field('Stroke', 0, *_FLAG),
+    Field('HeartDiseaseorAttack', 0, *_FLAG), Field('PhysActivity', 1, *_FLAG),
+    Field('Fruits', 1, *_FLAG), Field('Veggies', 1, *_FLAG), Field('HvyAlcoholConsump', 0, *_FLAG),
+    Field('AnyHealthcare', 1, *_FLAG), Field('NoDocbcCost', 0, *_FLAG),
+    Field('GenHlth', 2, 1, 5, 'int'), Field('MentHlth', 0, 0, 30, 'int'), Field('PhysHlth', 0, 0, 30, 'int'),
+    Field('DiffWalk', 0, *_FLAG), Field('Sex', 0, *_FLAG), Field('Age', 8, 1, 13, 'int'),
+    Field('Education', 5, 1, 6, 'int'), Field('Income', 7, 1, 8, 'int'),
+])
+
+# Hyperparameters; 'pipeline_version' must be bumped whenever the data
+# loading or the synthetic generator changes so that old artifacts are not
+# reused. 'synthetic_rows' and 'seed' only apply when the BRFSS file is missing.
+DIABETES_PARAMS = {
+    'pipeline_version': 1,
+    'max_iter': 200,
+    'learning_rate': 0.1,
+    'max_leaf_nodes': 31,
+    'random_state': 42,
+    'synthetic_rows': 253680,
+    'seed': 2015,
+}
+
+
+def age_bucket(age_years):
+    """
+    Map ages in years to the BRFSS 13-level age category
+    (1 = 18-24, 2 = 25-29, ..., 12 = 75-79, 13 = 80 or older).
+    NaN stays NaN.
+    """
+    return np.clip((np.asarray(age_years, dtype=np.float64) - 15) // 5, 1, 13)
+
+
+def diabetes_model_array(records):
+    """
+    Build model input rows in DIABETES_FEATURES order.
+
+    Args:
+        records: List of mappings such as request.form. BRFSS indicators
+                 are read by name; the form's 'age' (in years) and 'gender'
+                 fill in Age and Sex when those are not given. Values are
+                 checked against DIABETES_MODEL_SCHEMA (see FieldSchema.validate).
+
+    Returns:
+        Array of shape (n_records, 21)
+    """
+    age, gender = read_fields(records, ['age', 'gender']).T
+    return diabetes_model_inputs(read_fields(records, DIABETES_FEATURES), age, gender)
+
+
+def diabetes_model_inputs(X, age, gender):
+    """
+    Complete and validate model input rows already read by read_fields().
+
+    Args:
+        X: Array of the DIABETES_FEATURES fields, NaN where missing; modified in place
+        age: Array of the form's ages in years (NaN where missing)
+        gender: Array of the form's gender codes (NaN where missing)
+    """
+    for name, fallback in (('Age', age_bucket(age)), ('Sex', gender)):
+        j = DIABETES_FEATURES.index(name)
+        X[:, j] = np.where(np.isnan(X[:, j]), fallback, X[:, j])
+    return DIABETES_MODEL_SCHEMA.validate(X)
+
+
+def diabetes_model_row(values):
+    """Build one model input row (an array of 21 floats) from a mapping."""
+    return diabetes_model_array([values])[0]
+
+
+def generate_brfss_like(n_rows, seed=0):
+    """
+    Generate a synthetic data set shaped like the BRFSS 2015 diabetes file.
+
+    The columns, codes and value ranges match the real file, and the main
+    risk factors (age, BMI, blood pressure, cholesterol, general health,
+    income) drive both each other and the label, at a prevalence of about
+    14% like the real data.
+
+    Returns:
+        Tuple of (X, y): a DataFrame of DIABETES_FEATURES in compact dtypes
+        and an int8 Series 'Diabetes_binary'
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+
+    def coin(p):
+        return (rng.random(n_rows) < p).astype(np.int8)
+
+    def logistic(z):
+        return 1.0 / (1.0 + np.exp(-z))
+
+    # Demographics
+    age = rng.choice(np.arange(1, 14), n_rows,
+                     p=[0.02, 0.03, 0.04, 0.05, 0.06, 0.08, 0.10, 0.12, 0.13, 0.13, 0.09, 0.06, 0.09])
+    sex = coin(0.44)
+    education = rng.choice(np.arange(1, 7), n_rows, p=[0.001, 0.016, 0.037, 0.247, 0.277, 0.422])
+    income = np.clip(np.round(rng.normal(5.0 + 0.4 * (education - 4), 2.0)), 1, 8)
+
+    # Body mass index, right-skewed like the survey answers
+    bmi = np.clip(np.round(rng.lognormal(np.log(27.5), 0.2, n_rows) + 0.15 * (age - 7)), 12, 98)
+    obese = (bmi - 30) / 6.0
+    older = (age - 7) / 3.0
+    poorer = (4.5 - income) / 2.0
+
+    # Risk factors that depend on age and weight
+    high_bp = coin(logistic(-0.6 + 0.9 * older + 0.6 * obese))
+    high_chol = coin(logistic(-0.3 + 0.6 * older + 0.3 * obese))
+    chol_check = coin(0.96)
+    smoker = coin(logistic(-0.3 + 0.3 * poorer))
+    stroke = coin(logistic(-4.0 + 0.7 * older + 0.5 * high_bp))
+    heart = coin(logistic(-3.5 + 0.8 * older + 0.5 * high_bp + 0.4 * high_chol + 0.4 * smoker))
+    phys_activity = coin(logistic(1.4 - 0.4 * obese - 0.4 * poorer))
+    fruits = coin(logistic(0.6 - 0.2 * poorer))
+    veggies = coin(logistic(1.5 - 0.2 * poorer))
+    alcohol = coin(0.056)
+    healthcare = coin(logistic(3.0 - 0.5 * poorer))
+    no_doc = coin(logistic(-2.6 + 0.6 * poorer))
+
+    # Self-reported health, from 1 (excellent) to 5 (poor)
+    health_burden = (0.5 * obese + 0.4 * poorer + 0.6 * heart + 0.6 * stroke
+                     + 0.4 * high_bp - 0.5 * phys_activity + 0.2 * older)
+    gen_hlth = np.clip(np.round(2.5 + health_burden + rng.normal(0, 0.9, n_rows)), 1, 5)
+    bad_days = logistic(-1.5 + 0.8 * (gen_hlth - 3))
+    ment_hlth = np.where(rng.random(n_rows) < bad_days, rng.integers(1, 31, n_rows), 0)
+    phys_hlth = np.where(rng.random(n_rows) < bad_days * 1.2, rng.integers(1, 31, n_rows), 0)
+    diff_walk = coin(logistic(-3.0 + 0.9 * (gen_hlth - 2) + 0.3 * older + 0.3 * obese))
+
+    X = pd.DataFrame({
+        'HighBP': high_bp, 'HighChol': high_chol, 'CholCheck': chol_check, 'BMI': bmi,
+        'Smoker': smoker, 'Stroke': stroke, 'HeartDiseaseorAttack': heart,
+        'PhysActivity': phys_activity, 'Fruits': fruits, 'Veggies': veggies,
+        'HvyAlcoholConsump': alcohol, 'AnyHealthcare': healthcare, 'NoDocbcCost': no_doc,
+        'GenHlth': gen_hlth, 'MentHlth': ment_hlth, 'PhysHlth': phys_hlth,
+        'DiffWalk': diff_walk, 'Sex': sex, 'Age': age, 'Education': education, 'Income': income,
+    }).astype(DIABETES_DTYPES)
+
+    # Label: main risk factors plus noise, intercept set for ~14% prevalence
+    z = (-3.5 + 0.75 * high_bp + 0.55 * high_chol + 0.5 * chol_check + 0.07 * (bmi - 28)
+         + 0.5 * (gen_hlth - 2.5) + 0.3 * heart + 0.3 * diff_walk + 0.15 * (age - 8)
+         - 0.08 * (income - 6) + 0.25 * sex - 0.7 * alcohol)
+    y = pd.Series(coin(logistic(z)), name='Diabetes_binary')
+    return X, y
+
+
+def load_diabetes_training_data(csv_path=DIABETES_CSV, params=DIABETES_PARAMS):
+    """
+    Read the BRFSS file in compact dtypes, or generate a synthetic stand-in
+    when it is missing.
+
+    Returns:
+        Tuple of (X, y) where X holds the DIABETES_FEATURES columns
+    """
+    if not os.path.exists(csv_path):
+        return generate_brfss_like(params['synthetic_rows'], params['seed'])
+    import pandas as pd
+
+    # The file stores every value as a float ("1.0"); read as float32 and
+    # narrow afterwards, which keeps the peak memory low as well
+    diabetes_data = pd.read_csv(csv_path, dtype=np.float32)
+
+    # Handle missing values like the m script: median of each column
+    diabetes_data = diabetes_data.fillna(diabetes_data.median())
+    X = diabetes_data[DIABETES_FEATURES].round().astype(DIABETES_DTYPES)
+    y = diabetes_data['Diabetes_binary'].astype(np.int8)
+    return X, y
+
+
+def train_diabetes_model(csv_path=DIABETES_CSV, params=DIABETES_PARAMS):
+    """Train a HistGradientBoostingClassifier on the diabetes data."""
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    X, y = load_diabetes_training_data(csv_path, params)
+    # Fit on the bare int8 array: the model then takes plain arrays in
+    # DIABETES_FEATURES order without warning about missing feature names
+    diabetes_model = HistGradientBoostingClassifier(max_iter=params['max_iter'],
+                                                    learning_rate=params['learning_rate'],
+                                                    max_leaf_nodes=params['max_leaf_nodes'],
+                                                    random_state=params['random_state'])
+    diabetes_model.fit(X[DIABETES_FEATURES].to_numpy(), y.to_numpy())
+    return diabetes_model
+
+
+def diabetes_artifact_key(csv_path=DIABETES_CSV, params=DIABETES_PARAMS):
+    """Return the artifact key for the current data and parameters."""
+    data_paths = [csv_path] if os.path.exists(csv_path) else []
+    return artifact_key(data_paths, params)
+
+
+def build_diabetes_artifact(csv_path=DIABETES_CSV, params=DIABETES_PARAMS, force=False):
+    """
+    Train the diabetes model and save it, unless an artifact for the same
+    data and parameters already exists.
+
+    Returns:
+        Path of the model artifact
+    """
+    model_path = artifact_path('diabetes', diabetes_artifact_key(csv_path, params))
+    if force or not os.path.exists(model_path):
+        if not os.path.exists(csv_path):
+            print(f"{csv_path} not found, training the diabetes model on synthetic BRFSS-shaped data")
+        save_artifact(train_diabetes_model(csv_path, params), model_path)
+        print(f"Diabetes model trained and saved to {model_path}")
+    return model_path
+
+
+def diabetes_model_available(csv_path=DIABETES_CSV):
+    """Whether a diabetes model is served, i.e. the BRFSS file is present."""
+    return os.path.exists(csv_path)
+
+
+def load_diabetes_artifact(csv_path=DIABETES_CSV, params=DIABETES_PARAMS):
+    """
+    Load the diabetes model, training it first if the data or the parameters
+    changed since the last build.
+
+    Only a model trained on the BRFSS file is served: without the file this
+    returns None and diabetes risk is scored by the rules alone.
+
+    Returns:
+        HistGradientBoostingClassifier, or None
+    """
+    if not diabetes_model_available(csv_path):
+        print(f"{csv_path} not found, not serving a diabetes model")
+        return None
+    return load_artifact(build_diabetes_artifact(csv_path, params))
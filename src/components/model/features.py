@@ -0,0 +1,146 @@
+"""
+Declarative field schemas and the parser that turns submitted fields into
+model input arrays.
+
+A schema lists each field's name, default, valid range and dtype. The
+parser reads every field without raising on missing keys: values that are
+missing, empty or not a number are replaced by the field's default. Values
+outside the range are clamped to it, and 'int' fields are rounded to the
+nearest whole number (halves to even), so an out-of-range reading still
+counts as high or low rather than as the healthy default. The form routes,
+the JSON endpoints and the batch API all parse through FieldSchema.
+
+read_fields() and FieldSchema.validate() split the same parse in two steps
+(NaN marks missing values in between), for callers that read a set of
+shared fields once and validate them per schema.
+"""
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# dtype is 'float' or 'int' (whole numbers only, e.g. codes and yes/no flags)
+Field = namedtuple('Field', ['name', 'default', 'low', 'high', 'dtype'])
+
+
+def read_fields(records, names, out=None):
+    """
+    Convert named fields of mappings (request.form, JSON objects) to floats.
+
+    Args:
+        records: List of mappings
+        names: Field names, in column order
+        out: Optional array of shape (n_records, n_names) to fill
+
+    Returns:
+        Array of shape (n_records, n_names), NaN where a field is missing or
+        not a number
+    """
+    X = np.empty((len(records), len(names)), dtype=np.float64) if out is None else out
+    for i, record in enumerate(records):
+        get = record.get
+        row = X[i]
+        for j, name in enumerate(names):
+            value = get(name)
+            if value is None or value == '':
+                row[j] = np.nan
+                continue
+            try:
+                row[j] = float(value)
+            except (TypeError, ValueError):
+                row[j] = np.nan
+    return X
+
+
+class FieldSchema:
+    """The fields of one model input, in column order."""
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.names = [field.name for field in self.fields]
+        self.defaults = np.array([field.default for field in self.fields], dtype=np.float64)
+        self.low = np.array([field.low for field in self.fields], dtype=np.float64)
+        self.high = np.array([field.high for field in self.fields], dtype=np.float64)
+        self.integral = np.array([field.dtype == 'int' for field in self.fields])
+        # Plain Python copy for the per-row parser, where NumPy calls would
+        # cost more than the work they do
+        self._spec = [(field.name, float(field.default), float(field.low), float(field.high), field.dtype == 'int')
+                      for field in self.fields]
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self.fields)
+
+    def positions(self, names):
+        """Return the column index of each of the given field names."""
+        index = {name: j for j, name in enumerate(self.names)}
+        return [index[name] for name in names]
+
+    def select(self, names):
+        """Return the schema of a subset of the fields, in the given order."""
+        return FieldSchema([self.fields[j] for j in self.positions(names)])
+
+    def validate(self, X):
+        """
+        Clamp the values of an (n, n_fields) array to the field ranges,
+        round 'int' fields, and give missing (NaN) values the defaults, in
+        place.
+
+        Returns:
+            X
+        """
+        np.clip(X, self.low, self.high, out=X)
+        np.copyto(X, np.round(X), where=self.integral)
+        # Adding 0.0 turns -0.0 into 0.0, as in parse_row(), so both parsers
+        # give the same bits (and cache keys)
+        X += 0.0
+        np.copyto(X, self.defaults, where=np.isnan(X))
+        return X
+
+    def parse_row(self, values):
+        """
+        Parse one mapping into a validated list of floats.
+
+        Same rules as read_fields() followed by validate(), in plain Python.
+        """
+        row = []
+        for name, default, low, high, integral in self._spec:
+            # Checking membership first is much cheaper than a missing-key
+            # get() on werkzeug's MultiDict
+            value = values[name] if name in values else None
+            if value is None or value == '':
+                row.append(default)
+                continue
+            try:
+                x = float(value)
+            except (TypeError, ValueError):
+                row.append(default)
+                continue
+            if x != x:
+                row.append(default)
+                continue
+            x = min(max(x, low), high)
+            row.append((round(x) if integral else x) + 0.0)
+        return row
+
+    def parse_many(self, records):
+        """
+        Parse a list of mappings into a validated (n_records, n_fields) array.
+        """
+        parse_row = self.parse_row
+        X = np.array([parse_row(record) for record in records], dtype=np.float64)
+        return X.reshape(len(records), len(self.fields))
+
+    def parse(self, values):
+        """
+        Parse a single mapping (such as request.form) into the thread's
+        preallocated (1, n_fields) array.
+
+        The array is overwritten by the next parse() on the same thread; copy
+        it if it has to outlive the request.
+        """
+        X = getattr(self._local, 'X', None)
+        if X is None:
+            X = self._local.X = np.empty((1, len(self.fields)), dtype=np.float64)
+        X[0] = self.parse_row(values)
+        return X
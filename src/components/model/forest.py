@@ -0,0 +1,302 @@
+"""
+Flat-array representation of a fitted sklearn RandomForestClassifier.
+
+compile_forest() copies the nodes of every tree into shared, contiguous
+arrays (one block of nodes per tree, located through 'roots'), which can be
+stored as a memory-mapped array bundle. FlatForest evaluates those arrays
+directly, without sklearn, for all trees and a whole batch of rows at once:
+through per-feature bitmask tables derived from the node arrays when every
+tree has at most 64 leaves, and otherwise by walking all trees level by level
+with vectorized indexing. compile_leaf_tables() builds the bitmask tables at
+build time as arrays too, so they are stored in the same bundle and mapped
+rather than rebuilt in every process.
+"""
+import numpy as np
+
+# Marker sklearn uses for the children of a leaf node
+TREE_LEAF = -1
+
+FOREST_ARRAYS = ('roots', 'feature', 'threshold', 'left', 'right', 'value')
+
+# Arrays written by compile_leaf_tables(); the per-feature thresholds and
+# tables are concatenated and located through the offset arrays
+LEAF_TABLE_ARRAYS = ('leaf_features', 'leaf_threshold_offsets', 'leaf_thresholds',
+                     'leaf_mask_offsets', 'leaf_masks', 'leaf_lowest_bit', 'leaf_start', 'leaf_value')
+
+# Rows evaluated at once by FlatForest.predict_proba
+CHUNK_SIZE = 16384
+
+# Features with at most this many distinct thresholds are binned by counting
+# comparisons instead of np.searchsorted
+SMALL_THRESHOLD_COUNT = 16
+
+
+def compile_forest(model):
+    """
+    Flatten a fitted RandomForestClassifier into node arrays.
+    
+    Child indices are rewritten to absolute positions in the concatenated
+    arrays, and the leaf values are normalised to class probabilities exactly
+    as sklearn's predict_proba does.
+    
+    Returns:
+        Dict of arrays named as in FOREST_ARRAYS
+    """
+    roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        is_leaf = left == TREE_LEAF
+        left = np.where(is_leaf, TREE_LEAF, left + offset)
+        right = np.where(is_leaf, TREE_LEAF, right + offset)
+        
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)
+        normalizer[normalizer == 0.0] = 1.0
+        value = value / normalizer[:, None]
+        
+        roots.append(offset)
+        features.append(tree.feature.astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(left)
+        rights.append(right)
+        values.append(value)
+        offset += tree.node_count
+    
+    return {
+        'roots': np.array(roots, dtype=np.int32),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values),
+    }
+
+
+# Unsigned lane types used to hold one tree's leaf bitmask, by leaf count
+_LANE_TYPES = ((8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64))
+
+
+def _leaf_order(left, right, root):
+    """
+    Return the leaves of one tree from left to right, and for every split node
+    the range of leaf positions in its left subtree.
+    """
+    leaves = []
+    left_spans = {}
+    
+    def visit(node):
+        if left[node] == TREE_LEAF:
+            leaves.append(node)
+            return
+        first = len(leaves)
+        visit(left[node])
+        left_spans[node] = (first, len(leaves))
+        visit(right[node])
+    
+    visit(root)
+    return leaves, left_spans
+
+
+def compile_leaf_tables(arrays):
+    """
+    Build per-feature bitmask tables that find every tree's exit leaf at once.
+    
+    Leaves of a tree are numbered left to right and each tree gets one bit per
+    leaf in its own lane. A split whose test fails (the row goes right) rules
+    out the leaves of its left subtree; the exit leaf is the lowest leaf that
+    no failing split rules out. Which splits on feature f fail only depends on
+    how many of f's distinct thresholds lie below the row's value, so for each
+    feature we precompute, per threshold count, the leaves ruled out in every
+    tree.
+    
+    Args:
+        arrays: Node arrays from compile_forest()
+    
+    Returns:
+        Dict of arrays named as in LEAF_TABLE_ARRAYS, or an empty dict when
+        a tree has more leaves than fit in a 64-bit lane
+    """
+    roots, feature, threshold = arrays['roots'], arrays['feature'], arrays['threshold']
+    left, right, value = arrays['left'], arrays['right'], arrays['value']
+    n_trees = len(roots)
+    n_leaves = np.add.reduceat(np.asarray(left) == TREE_LEAF, roots)
+    lane = next((dtype for bits, dtype in _LANE_TYPES if n_leaves.max() <= bits), None)
+    if lane is None:
+        return {}
+    
+    orders = [_leaf_order(left, right, int(root)) for root in roots]
+    leaf_start = np.concatenate([[0], np.cumsum(n_leaves)[:-1]]).astype(np.int64)
+    splits = {}
+    for tree, (leaves, left_spans) in enumerate(orders):
+        for node, (first, last) in left_spans.items():
+            ruled_out = ((1 << last) - 1) ^ ((1 << first) - 1)
+            splits.setdefault(int(feature[node]), []).append(
+                (float(threshold[node]), tree, ruled_out))
+    
+    features, all_thresholds, tables = [], [], []
+    for split_feature, feature_splits in sorted(splits.items()):
+        thresholds = np.unique([split_threshold for split_threshold, _, _ in feature_splits])
+        table = np.zeros((len(thresholds) + 1, n_trees), dtype=lane)
+        for split_threshold, tree, ruled_out in feature_splits:
+            # Rows with more than j thresholds below them fail split j
+            j = int(np.searchsorted(thresholds, split_threshold))
+            table[j + 1:, tree] |= lane(ruled_out)
+        features.append(split_feature)
+        all_thresholds.append(thresholds)
+        tables.append(table)
+    
+    all_leaves = np.concatenate([leaves for leaves, _ in orders])
+    # For narrow lanes, look the exit leaf position (the index of the lowest
+    # set bit) up directly instead of computing it; empty for wider lanes
+    lowest_bit = np.zeros(0, dtype=np.int8)
+    if np.dtype(lane).itemsize <= 2:
+        bits = np.arange(1 << (8 * np.dtype(lane).itemsize), dtype=np.int64)
+        lowest_bit = (np.frexp((bits & -bits).astype(np.float64))[1] - 1).astype(np.int8)
+    
+    return {
+        'leaf_features': np.array(features, dtype=np.int32),
+        'leaf_threshold_offsets': np.cumsum([0] + [len(t) for t in all_thresholds]).astype(np.int64),
+        'leaf_thresholds': np.concatenate(all_thresholds).astype(np.float64),
+        'leaf_mask_offsets': np.cumsum([0] + [len(t) for t in tables]).astype(np.int64),
+        'leaf_masks': np.concatenate(tables),
+        'leaf_lowest_bit': lowest_bit,
+        'leaf_start': leaf_start,
+        # One contiguous row of leaf probabilities per class
+        'leaf_value': np.ascontiguousarray(value[all_leaves].T),
+    }
+
+
+def _leaf_tables(arrays):
+    # Views of the compile_leaf_tables() arrays in the shape _exit_leaves()
+    # reads them; nothing is copied, so mapped arrays stay mapped
+    thresholds, masks = arrays['leaf_thresholds'], arrays['leaf_masks']
+    t_offsets, m_offsets = arrays['leaf_threshold_offsets'], arrays['leaf_mask_offsets']
+    features = [(int(feature), thresholds[t_offsets[k]:t_offsets[k + 1]], masks[m_offsets[k]:m_offsets[k + 1]])
+                for k, feature in enumerate(arrays['leaf_features'])]
+    lowest_bit = arrays['leaf_lowest_bit']
+    return {
+        'lane': masks.dtype.type,
+        'features': features,
+        'lowest_bit': lowest_bit if len(lowest_bit) else None,
+        'leaf_start': arrays['leaf_start'][:, None],
+        'leaf_value': list(arrays['leaf_value']),
+    }
+
+
+class FlatForest:
+    """Random forest classifier evaluated from flat node arrays."""
+    
+    def __init__(self, arrays, feature_names, classes):
+        """
+        Args:
+            arrays: Node arrays from compile_forest(), optionally with the
+                    compile_leaf_tables() arrays; the tables are built here
+                    when they are missing
+        """
+        self.roots = arrays['roots']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.feature_names = list(feature_names)
+        self.classes_ = np.asarray(classes)
+        if 'leaf_masks' not in arrays:
+            arrays = compile_leaf_tables(arrays)
+        self._tables = _leaf_tables(arrays) if arrays else None
+    
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+    
+    def _exit_leaves(self, X):
+        # Bitmask lookup (see _build_leaf_tables): returns leaves[t, i], the
+        # exit leaf of row i in tree t as an index into the leaf tables
+        tables = self._tables
+        lane = tables['lane']
+        # sklearn compares float32 features against float64 thresholds
+        columns = np.ascontiguousarray(X.T, dtype=np.float64)
+        ruled_out = np.zeros((X.shape[0], len(self.roots)), dtype=lane)
+        for feature, thresholds, table in tables['features']:
+            column = columns[feature]
+            if len(thresholds) <= SMALL_THRESHOLD_COUNT:
+                # Counting is cheaper than a binary search for a few thresholds
+                below = np.zeros(len(column), dtype=np.intp)
+                for threshold in thresholds:
+                    below += column > threshold
+            else:
+                below = np.searchsorted(thresholds, column)
+            ruled_out |= np.take(table, below, axis=0)
+        remaining = np.ascontiguousarray(~ruled_out.T)
+        if tables['lowest_bit'] is not None:
+            position = np.take(tables['lowest_bit'], remaining)
+        else:
+            lowest = remaining & (~remaining + lane(1))
+            position = np.frexp(lowest.astype(np.float64))[1] - 1
+        return tables['leaf_start'] + position
+    
+    def _leaves(self, X):
+        # Walk all trees for every row at once: node[t, i] is the current node
+        # of row i in tree t, and every step moves all unfinished walks one
+        # level down until each one sits on a leaf
+        rows = np.arange(X.shape[0])[None, :]
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        while True:
+            left = self.left[node]
+            active = left != TREE_LEAF
+            if not active.any():
+                return node
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(active, np.where(go_left, left, self.right[node]), node)
+    
+    def predict_proba(self, X, chunk_size=CHUNK_SIZE):
+        """
+        Predict class probabilities, matching RandomForestClassifier.predict_proba
+        bit for bit.
+        
+        Args:
+            X: Array of shape (n_rows, n_features) in feature_names order
+            chunk_size: Rows evaluated per step, bounding the temporary
+                        (n_trees, chunk_size) node arrays
+        
+        Returns:
+            Array of shape (n_rows, n_classes)
+        """
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2-D array, got {X.ndim} dimension(s)")
+        proba = np.zeros((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            stop = start + chunk_size
+            out = proba[start:stop]
+            # Accumulate tree by tree, in the same order and with the same
+            # float operations as sklearn, so the results are identical
+            if self._tables is not None:
+                leaves = self._exit_leaves(X[start:stop])
+                for c, leaf_value in enumerate(self._tables['leaf_value']):
+                    column = out[:, c]
+                    for tree_value in np.take(leaf_value, leaves):
+                        column += tree_value
+            else:
+                for tree_leaves in self._leaves(X[start:stop]):
+                    out += self.value[tree_leaves]
+        proba /= self.n_estimators
+        return proba
+
+
+def check_forest(model, forest, X):
+    """
+    Verify that a compiled forest reproduces model.predict_proba exactly.
+    
+    Raises:
+        ValueError: if any probability differs
+    """
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(np.asarray(X, dtype=np.float64))
+    if not np.array_equal(expected, actual):
+        mismatches = int(np.count_nonzero((expected != actual).any(axis=1)))
+        raise ValueError(f"Compiled forest differs from predict_proba on {mismatches} of {len(X)} rows")
@@ -0,0 +1,193 @@
+"""
+TensorFlow-free inference for the heart disease network trained by the v script.
+
+The v script trains a Sequential 13 -> 64 -> 32 -> 1 network (ReLU, ReLU,
+sigmoid) on StandardScaler-ed features. export_heart_npz() writes its Dense
+weights to a single .npz with the scaler folded into the first layer, and
+HeartMLP runs the forward pass with plain NumPy, so serving never imports
+TensorFlow. For serving, the .npz is unpacked into a memory-mappable array
+bundle (see artifacts.py) that all workers on a host share.
+"""
+import functools
+import json
+import os
+
+import numpy as np
+
+from artifacts import (ARTIFACT_DIR, MODEL_DIR, artifact_key, bundle_path,
+                       save_array_bundle, open_array_bundle)
+from scoring import HEART_SCHEMA
+
+HEART_H5 = os.path.join(MODEL_DIR, 'heart_disease_model.h5')
+HEART_SCALER = os.path.join(MODEL_DIR, 'scaler.joblib')
+HEART_FEATURES = os.path.join(MODEL_DIR, 'feature_names.json')
+HEART_NPZ = os.path.join(ARTIFACT_DIR, 'heart_mlp.npz')
+HEART_CSV = os.path.join(MODEL_DIR, 'heart_disease_data.csv')
+
+# Largest difference from Keras accepted for an exported model; the NumPy
+# forward pass runs in float32 like Keras, so only rounding should differ
+EXPORT_TOLERANCE = 1e-4
+
+
+def fold_scaler(kernel, bias, mean, scale):
+    """
+    Fold a StandardScaler into the Dense layer that follows it.
+
+    ((x - mean) / scale) @ W + b == x @ (W / scale[:, None]) + (b - (mean / scale) @ W)
+
+    Returns:
+        Tuple of (kernel, bias) that take unscaled features
+    """
+    kernel = np.asarray(kernel, dtype=np.float64)
+    bias = np.asarray(bias, dtype=np.float64)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+    folded_kernel = kernel / scale[:, None]
+    folded_bias = bias - (mean / scale) @ kernel
+    return folded_kernel, folded_bias
+
+
+def export_heart_npz(h5_path=HEART_H5, scaler_path=HEART_SCALER,
+                     features_path=HEART_FEATURES, out_path=HEART_NPZ):
+    """
+    Export the Keras heart model and its scaler to a single .npz.
+
+    This is the only place TensorFlow is needed; run it as part of the build
+    step after the v script has trained the model.
+
+    Returns:
+        Path of the written .npz
+    """
+    import tensorflow as tf
+    from joblib import load
+
+    keras_model = tf.keras.models.load_model(h5_path, compile=False)
+    scaler = load(scaler_path)
+    with open(features_path, 'r') as f:
+        feature_names = json.load(f)
+
+    # Dropout layers are identity at inference time, only Dense layers matter
+    dense_layers = [layer for layer in keras_model.layers if layer.get_weights()]
+    arrays = {}
+    for i, layer in enumerate(dense_layers):
+        kernel, bias = layer.get_weights()
+        if i == 0:
+            kernel, bias = fold_scaler(kernel, bias, scaler.mean_, scaler.scale_)
+        arrays[f'kernel_{i}'] = np.asarray(kernel, dtype=np.float32)
+        arrays[f'bias_{i}'] = np.asarray(bias, dtype=np.float32)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path,
+             n_layers=np.array(len(dense_layers)),
+             scaler_mean=np.asarray(scaler.mean_, dtype=np.float64),
+             scaler_scale=np.asarray(scaler.scale_, dtype=np.float64),
+             feature_names=np.array(feature_names),
+             **arrays)
+    os.replace(tmp_path, out_path)
+
+    _check_export(keras_model, scaler, feature_names, out_path)
+    return out_path
+
+
+def _check_export(keras_model, scaler, feature_names, npz_path):
+    """
+    Compare the NumPy forward pass against Keras on the training data.
+
+    Raises:
+        ValueError: if any probability differs by more than EXPORT_TOLERANCE;
+                    the exported .npz is removed so it is never served
+    """
+    if not os.path.exists(HEART_CSV):
+        return
+    import pandas as pd
+
+    X = pd.read_csv(HEART_CSV, encoding='utf-8-sig')[feature_names].to_numpy(dtype=np.float64)
+    expected = keras_model.predict(scaler.transform(X), verbose=0).ravel()
+    actual = HeartMLP.from_npz(npz_path).predict_proba(X)
+    difference = float(np.max(np.abs(expected - actual)))
+    print(f"Heart model export check: max abs difference vs Keras = {difference:.2e}")
+    if not difference <= EXPORT_TOLERANCE:
+        os.remove(npz_path)
+        raise ValueError(f"Exported heart model differs from Keras by {difference:.2e} "
+                         f"(tolerance {EXPORT_TOLERANCE:.0e})")
+
+
+@functools.lru_cache(maxsize=None)
+def heart_model_columns(heart_features):
+    """
+    Return the HEART_SCHEMA columns a heart model takes, in its order.
+
+    Args:
+        heart_features: Tuple of the model's feature names
+                        (HeartMLP.feature_names)
+    """
+    return HEART_SCHEMA.positions(heart_features)
+
+
+def build_heart_bundle(npz_path=HEART_NPZ):
+    """
+    Unpack the exported .npz into a memory-mappable bundle keyed on its hash.
+
+    Returns:
+        Path of the bundle directory
+    """
+    path = bundle_path('heart', artifact_key([npz_path], {}))
+    if not os.path.isdir(path):
+        with np.load(npz_path) as data:
+            arrays = {name: data[name] for name in data.files if name.startswith(('kernel_', 'bias_'))}
+            feature_names = [str(name) for name in data['feature_names']]
+            n_layers = int(data['n_layers'])
+        save_array_bundle(path, arrays, {'feature_names': feature_names, 'n_layers': n_layers})
+    return path
+
+
+class HeartMLP:
+    """Pure-NumPy forward pass of the exported heart disease network."""
+
+    def __init__(self, kernels, biases, feature_names):
+        self.kernels = kernels
+        self.biases = biases
+        self.feature_names = feature_names
+
+    @classmethod
+    def from_npz(cls, path=HEART_NPZ):
+        with np.load(path) as data:
+            n_layers = int(data['n_layers'])
+            kernels = [data[f'kernel_{i}'] for i in range(n_layers)]
+            biases = [data[f'bias_{i}'] for i in range(n_layers)]
+            feature_names = [str(name) for name in data['feature_names']]
+        return cls(kernels, biases, feature_names)
+
+    @classmethod
+    def from_bundle(cls, path, mmap=True):
+        arrays, meta = open_array_bundle(path, mmap=mmap)
+        n_layers = meta['n_layers']
+        kernels = [arrays[f'kernel_{i}'] for i in range(n_layers)]
+        biases = [arrays[f'bias_{i}'] for i in range(n_layers)]
+        return cls(kernels, biases, meta['feature_names'])
+
+    def predict_proba(self, X):
+        """
+        Predict the probability of heart disease.
+
+        Args:
+            X: Unscaled features in feature_names order, either a single row
+               of shape (n_features,) or a batch of shape (n_rows, n_features)
+
+        Returns:
+            Array of shape (n_rows,) with probabilities between 0 and 1
+        """
+        h = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        last = len(self.kernels) - 1
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            h = h @ kernel + bias
+            if i < last:
+                np.maximum(h, 0, out=h)
+        # Numerically stable sigmoid
+        return np.exp(-np.logaddexp(0, -h[:, 0]))
+
+    def predict_one(self, patient_data):
+        """Predict for a single patient given as a dict keyed by feature name."""
+        row = [patient_data[name] for name in self.feature_names]
+        return float(self.predict_proba(row)[0])
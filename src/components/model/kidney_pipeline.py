@@ -0,0 +1,148 @@
+"""
+Kidney disease model training pipeline.
+
+Trains the RandomForest used by the /kidney route from kidney_disease.csv and
+persists it as content-addressed artifacts (see artifacts.py), so servers
+load the fitted model instead of retraining it on every start. Two artifacts
+are written per build: the pickled sklearn model and a memory-mappable bundle
+of the compiled forest (see forest.py), which is what the server opens.
+"""
+import functools
+import os
+
+from artifacts import (MODEL_DIR, artifact_key, artifact_path, bundle_path, save_artifact,
+                       load_artifact, save_array_bundle, open_array_bundle)
+from forest import FlatForest, compile_forest, compile_leaf_tables, check_forest
+from scoring import KIDNEY_SCHEMA
+
+KIDNEY_CSV = os.path.join(MODEL_DIR, 'kidney_disease.csv')
+
+# Features in the order the /kidney form provides them
+KIDNEY_FEATURES = ['age', 'bp', 'al', 'su', 'rbc', 'pc', 'pcc', 'ba', 'bgr', 'bu', 'sc']
+
+# Hyperparameters; 'pipeline_version' must be bumped whenever the data cleanup
+# below or the bundle layout changes so that old artifacts are not reused
+KIDNEY_PARAMS = {
+    'pipeline_version': 2,
+    'n_estimators': 20,
+    'random_state': 42,
+}
+
+# Encoding of the categorical columns, matching the /kidney form values
+CATEGORY_CODES = {
+    'normal': 0, 'abnormal': 1,
+    'notpresent': 0, 'present': 1,
+}
+
+
+def load_kidney_training_data(csv_path=KIDNEY_CSV):
+    """
+    Read and clean kidney_disease.csv.
+    
+    Returns:
+        Tuple of (X, y) where X holds the KIDNEY_FEATURES columns
+    """
+    import pandas as pd
+    
+    kidney_data = pd.read_csv(csv_path)
+    
+    # Rename columns for consistency
+    kidney_data.columns = [col.strip().lower().replace(" ", "_") for col in kidney_data.columns]
+    
+    # Fix inconsistent labels and convert target labels to numerical values
+    kidney_data['classification'] = kidney_data['classification'].str.strip().map({'ckd': 1, 'notckd': 0})
+    
+    # Encode the categorical columns; coercing them to numeric directly turns
+    # every value into NaN and leaves no rows to train on
+    for col in ['rbc', 'pc', 'pcc', 'ba']:
+        kidney_data[col] = kidney_data[col].str.strip().map(CATEGORY_CODES)
+    
+    # Convert the remaining columns to numeric, coercing errors
+    kidney_df = kidney_data[KIDNEY_FEATURES + ['classification']].apply(pd.to_numeric, errors='coerce')
+    
+    # Handle missing values
+    kidney_df = kidney_df.dropna(axis=0).reset_index(drop=True)
+    
+    X = kidney_df[KIDNEY_FEATURES]
+    y = kidney_df['classification'].astype(int)
+    return X, y
+
+
+def train_kidney_model(csv_path=KIDNEY_CSV, params=KIDNEY_PARAMS):
+    """Train a RandomForestClassifier on the cleaned kidney data."""
+    from sklearn.ensemble import RandomForestClassifier
+    
+    X, y = load_kidney_training_data(csv_path)
+    kidney_model = RandomForestClassifier(n_estimators=params['n_estimators'],
+                                          random_state=params['random_state'])
+    kidney_model.fit(X, y)
+    return kidney_model
+
+
+def kidney_artifact_key(csv_path=KIDNEY_CSV, params=KIDNEY_PARAMS):
+    """Return the artifact key for the current CSV contents and parameters."""
+    return artifact_key([csv_path], params)
+
+
+def build_kidney_artifact(csv_path=KIDNEY_CSV, params=KIDNEY_PARAMS, force=False):
+    """
+    Train the kidney model and write its artifacts, unless artifacts for the
+    same data and parameters already exist.
+    
+    Returns:
+        Path of the forest bundle
+    """
+    key = kidney_artifact_key(csv_path, params)
+    model_path = artifact_path('kidney', key)
+    forest_path = bundle_path('kidney', key)
+    if force or not os.path.exists(model_path):
+        save_artifact(train_kidney_model(csv_path, params), model_path)
+        print(f"Kidney disease model trained and saved to {model_path}")
+    if force or not os.path.isdir(forest_path):
+        kidney_model = load_artifact(model_path)
+        arrays = compile_forest(kidney_model)
+        # The exit-leaf lookup tables go in the bundle too, so the workers map
+        # them instead of each building a private copy
+        arrays.update(compile_leaf_tables(arrays))
+        classes = [int(c) for c in kidney_model.classes_]
+        # The feature schema is taken from the columns the model was fitted
+        # on, so serving always builds inputs in the training column order
+        kidney_features = [str(name) for name in kidney_model.feature_names_in_]
+        # Refuse to write a bundle that would serve different probabilities
+        X, _ = load_kidney_training_data(csv_path)
+        check_forest(kidney_model, FlatForest(arrays, kidney_features, classes), X)
+        save_array_bundle(forest_path, arrays, {
+            'feature_names': kidney_features,
+            'classes': classes,
+        })
+    return forest_path
+
+
+def load_kidney_sklearn_model(csv_path=KIDNEY_CSV, params=KIDNEY_PARAMS):
+    """Load the pickled RandomForestClassifier, building it if needed."""
+    build_kidney_artifact(csv_path, params)
+    return load_artifact(artifact_path('kidney', kidney_artifact_key(csv_path, params)))
+
+
+def load_kidney_artifact(csv_path=KIDNEY_CSV, params=KIDNEY_PARAMS):
+    """
+    Open the kidney forest bundle read-only via mmap, training the model
+    first if the CSV or the parameters changed since the last build.
+    
+    Returns:
+        FlatForest
+    """
+    arrays, meta = open_array_bundle(build_kidney_artifact(csv_path, params))
+    return FlatForest(arrays, meta['feature_names'], meta['classes'])
+
+
+@functools.lru_cache(maxsize=None)
+def kidney_model_columns(kidney_features):
+    """
+    Return the KIDNEY_SCHEMA columns a kidney model takes, in its order.
+    
+    Args:
+        kidney_features: Tuple of the model's training columns
+                         (FlatForest.feature_names)
+    """
+    return KIDNEY_SCHEMA.positions(kidney_features)
@@ -0,0 +1,82 @@
+"""
+Shared vs. private memory of the serving processes (Linux only).
+
+With preload-then-fork serving the model arrays and the interpreter state
+loaded by the master should stay shared with every worker. These helpers read
+/proc/<pid>/smaps_rollup so we can check how much each worker actually shares
+and how much it holds privately.
+"""
+import os
+
+# smaps fields summed into each reported figure (values are in kB)
+_FIELDS = {
+    'rss_kb': ('Rss',),
+    'pss_kb': ('Pss',),
+    'shared_kb': ('Shared_Clean', 'Shared_Dirty'),
+    'private_kb': ('Private_Clean', 'Private_Dirty'),
+}
+
+
+def process_memory(pid='self'):
+    """
+    Return the Rss, Pss, shared and private memory of a process in kB.
+    
+    Returns None where /proc is not available (e.g. on Windows or macOS).
+    """
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        # Kernels older than 4.14 only have the per-mapping smaps file
+        path = f"/proc/{pid}/smaps"
+    try:
+        with open(path, 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    
+    totals = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+            key = parts[0][:-1]
+            totals[key] = totals.get(key, 0) + int(parts[1])
+    return {name: sum(totals.get(key, 0) for key in keys) for name, keys in _FIELDS.items()}
+
+
+def child_pids(pid):
+    """Return the pids of the direct children of a process."""
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        tids = os.listdir(task_dir)
+    except OSError:
+        return children
+    for tid in tids:
+        try:
+            with open(os.path.join(task_dir, tid, 'children'), 'r') as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return children
+
+
+def worker_memory_report(master_pid):
+    """
+    Return the memory figures of a master process and all of its workers.
+    
+    Returns:
+        Dict of pid -> process_memory() result
+    """
+    report = {master_pid: process_memory(master_pid)}
+    for pid in child_pids(master_pid):
+        report[pid] = process_memory(pid)
+    return report
+
+
+def format_memory(pid, memory):
+    """Format one process_memory() result as a log line."""
+    if memory is None:
+        return f"pid {pid}: memory information unavailable"
+    return (f"pid {pid}: rss {memory['rss_kb'] / 1024:.1f} MB, "
+            f"shared {memory['shared_kb'] / 1024:.1f} MB, "
+            f"private {memory['private_kb'] / 1024:.1f} MB, "
+            f"pss {memory['pss_kb'] / 1024:.1f} MB")
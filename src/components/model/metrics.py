@@ -0,0 +1,73 @@
+"""
+In-process serving metrics: counters and histograms, reported by /metrics.
+"""
+import bisect
+import threading
+
+# Default histogram bucket upper bounds (powers of two)
+POWERS_OF_TWO = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+
+# Histogram bucket upper bounds for latencies in milliseconds
+LATENCY_MS_BOUNDS = [0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+
+class Histogram:
+    """Counts of observed values per bucket, plus their count and sum."""
+
+    def __init__(self, bounds=POWERS_OF_TWO):
+        self.bounds = list(bounds)
+        # The last bucket counts values above the largest bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self):
+        # A list rather than a dict, so the buckets stay in order in JSON
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'buckets': [[label, count] for label, count in zip(labels, self.counts)],
+        }
+
+
+class Metrics:
+    """Thread-safe registry of named counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, amount=1):
+        """Increase a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, value, bounds=POWERS_OF_TWO):
+        """Record a value in a histogram, creating it with the given bucket bounds."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(bounds)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """Return all metrics as a JSON-friendly dict."""
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'histograms': {name: h.snapshot() for name, h in self._histograms.items()},
+            }
+
+
+# Metrics of this process
+metrics = Metrics()
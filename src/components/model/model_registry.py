@@ -0,0 +1,154 @@
+"""
+Lazy, thread-safe registry for the disease risk models.
+
+Models are registered with a loader function and are only loaded the first
+time a request asks for them, so a worker can start accepting traffic before
+every model is in memory.
+"""
+import threading
+import time
+
+# Load states reported by ModelRegistry.status()
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+class _ModelEntry:
+    """Book-keeping for a single registered model."""
+
+    def __init__(self, name, loader, version=None):
+        self.name = name
+        self.loader = loader
+        self.version_fn = version
+        self.lock = threading.Lock()
+        self.state = NOT_LOADED
+        self.model = None
+        self.version = None
+        self.error = None
+        self.load_seconds = None
+
+
+class ModelRegistry:
+    """
+    Holds the disease models and loads each one on first use.
+
+    Loading is guarded by a per-model lock, so concurrent requests in a
+    threaded server trigger exactly one load and all wait for its result.
+    Once a model is loaded, lookups do not take any lock.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def register(self, name, loader, version=None):
+        """
+        Register a model loader.
+
+        Args:
+            name: Key used to look the model up (e.g. 'kidney')
+            loader: Zero-argument callable returning the loaded model.
+                    It may return None when no model is available.
+            version: Optional zero-argument callable returning a string that
+                     identifies the loaded model (such as its artifact key);
+                     called after each successful load
+        """
+        self._entries[name] = _ModelEntry(name, loader, version)
+
+    def get(self, name):
+        """
+        Return the model registered under name, loading it if needed.
+
+        Returns None if the model failed to load or the loader provided none,
+        so callers can fall back to the rule-based scorers.
+        """
+        entry = self._entries[name]
+        if entry.state == LOADED:
+            return entry.model
+
+        with entry.lock:
+            if entry.state in (NOT_LOADED, LOADING):
+                self._load(entry)
+        return entry.model
+
+    def _load(self, entry):
+        # Called with entry.lock held
+        entry.state = LOADING
+        start = time.perf_counter()
+        try:
+            model = entry.loader()
+        except Exception as e:
+            print(f"Error loading {entry.name} model: {e}")
+            entry.model = None
+            entry.version = None
+            entry.error = str(e)
+            entry.state = FAILED
+        else:
+            version = None
+            if model is not None and entry.version_fn is not None:
+                try:
+                    version = entry.version_fn()
+                except Exception as e:
+                    print(f"Error reading {entry.name} model version: {e}")
+            entry.model = model
+            entry.version = version
+            entry.error = None
+            entry.state = LOADED
+        entry.load_seconds = time.perf_counter() - start
+
+    def reload(self, name):
+        """Discard the current model (or failure) and load it again."""
+        entry = self._entries[name]
+        with entry.lock:
+            self._load(entry)
+        return entry.model
+
+    def warm(self, names=None, background=False):
+        """
+        Load the given models (all registered models by default).
+
+        With background=True the models are loaded in a daemon thread and the
+        thread is returned, so the server can start answering requests while
+        the models come up.
+        """
+        names = list(self._entries) if names is None else list(names)
+
+        def load_all():
+            for name in names:
+                self.get(name)
+
+        if background:
+            thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+            thread.start()
+            return thread
+        load_all()
+        return None
+
+    def version(self, name):
+        """
+        Return the version of the loaded model, or None if the model is not
+        available or was registered without a version.
+
+        Results cached under a version (see caching.py) are not reused once
+        a reload changes it.
+        """
+        entry = self._entries[name]
+        return entry.version if entry.state == LOADED else None
+
+    def is_ready(self):
+        """True once every registered model has finished loading (or failed)."""
+        return all(entry.state in (LOADED, FAILED) for entry in self._entries.values())
+
+    def status(self):
+        """Return the load state of every registered model as a JSON-friendly dict."""
+        return {
+            name: {
+                'state': entry.state,
+                'available': entry.state == LOADED and entry.model is not None,
+                'version': entry.version,
+                'load_seconds': entry.load_seconds,
+                'error': entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
@@ -0,0 +1,67 @@
+"""
+Pages rendered once at startup and served as immutable bytes.
+
+The GET pages of the form routes do not depend on the request, so they are
+rendered a single time when the app starts. Each page carries a strong ETag
+(a hash of its bytes); a conditional request whose If-None-Match matches is
+answered with 304 Not Modified without rendering anything. Pages large
+enough to be worth compressing also keep a gzip copy made at startup, which
+is sent to clients that accept gzip.
+"""
+import hashlib
+
+from flask import Response, render_template, request
+
+from compression import COMPRESSIBLE_MIMETYPES, GZIP_MIN_SIZE, accepts_gzip, gzip_compress, record_compression
+
+# Browsers may store the pages but must revalidate them (cheaply, via the
+# ETag) before reuse, so a deploy with new pages is picked up immediately
+PAGE_CACHE_CONTROL = 'public, no-cache'
+
+
+class PrerenderedPage:
+    """A rendered page (or other fixed response body) with its strong ETag."""
+
+    def __init__(self, body, mimetype='text/html', cache_control=PAGE_CACHE_CONTROL):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.headers = {'ETag': f'"{self.etag}"', 'Cache-Control': cache_control}
+        self.gzip_body = None
+        if mimetype in COMPRESSIBLE_MIMETYPES and len(body) >= GZIP_MIN_SIZE:
+            self.gzip_body = gzip_compress(body)
+            self.headers['Vary'] = 'Accept-Encoding'
+            # The gzip copy is a different representation, so it gets its own ETag
+            self.gzip_not_modified_headers = dict(self.headers, ETag=f'"{self.etag}-gzip"')
+            self.gzip_headers = dict(self.gzip_not_modified_headers, **{'Content-Encoding': 'gzip'})
+
+    def response(self):
+        """Respond to the current request: 304 if the client's copy is current, else the page."""
+        if self.gzip_body is not None and accepts_gzip():
+            body, headers, not_modified_headers = self.gzip_body, self.gzip_headers, self.gzip_not_modified_headers
+        else:
+            body, headers, not_modified_headers = self.body, self.headers, self.headers
+        # If-None-Match uses the weak comparison (RFC 9110), so W/"<etag>" matches too
+        if request.if_none_match.contains_weak(headers['ETag'][1:-1]):
+            return Response(status=304, headers=not_modified_headers)
+        if body is self.gzip_body:
+            record_compression(len(self.body), len(body))
+        return Response(body, mimetype=self.mimetype, headers=headers)
+
+
+def prerender_pages(app, pages):
+    """
+    Render pages that do not depend on the request.
+
+    Args:
+        app: Flask app whose templates are rendered
+        pages: Dict of name -> (template name, context dict)
+
+    Returns:
+        Dict of name -> PrerenderedPage
+    """
+    with app.app_context():
+        return {
+            name: PrerenderedPage(render_template(template, **context).encode('utf-8'))
+            for name, (template, context) in pages.items()
+        }
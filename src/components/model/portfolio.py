@@ -0,0 +1,202 @@
+"""
+Streaming portfolio aggregation for underwriting reports.
+
+PortfolioSummary consumes scored applicants chunk by chunk (the per-disease
+risks, and the combined risk if it is stored) and keeps only running totals:
+the summed risks and premiums, the number of applicants per premium tier and
+a histogram sketch of the combined risk for quantiles. Memory does not grow
+with the number of applicants, and summaries of different shards can be
+merged, so a file of any size can be split across machines. Applicants with
+a missing (NaN) risk are counted as skipped and left out of every other
+total, so they neither land in the top tier nor pull the means down.
+
+    python portfolio.py summarize scored.csv --out summary.json
+    python portfolio.py merge shard-*.json --out summary.json
+
+The input is a CSV with heart_risk, kidney_risk and diabetes_risk columns
+(and optionally combined_risk), one row per applicant.
+"""
+import argparse
+import json
+
+import numpy as np
+
+from premiums import premium_table
+from scoring import combine_risks
+
+RISK_COLUMNS = ['heart_risk', 'kidney_risk', 'diabetes_risk']
+
+# Rows read per chunk of the input file
+CHUNK_ROWS = 100000
+
+# Bins of the combined risk sketch over [0, 1]; quantiles are accurate to
+# half a bin (0.00005)
+SKETCH_BINS = 10000
+
+QUANTILES = [0.5, 0.75, 0.9, 0.95, 0.99]
+
+
+def read_scored_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Yield the risk columns of a scored applicants CSV, chunk by chunk.
+
+    Yields:
+        Dict of column name -> float64 array, with 'combined_risk' only if
+        the file has it
+    """
+    import pandas as pd
+
+    columns = pd.read_csv(path, nrows=0).columns
+    missing = [name for name in RISK_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column")
+    usecols = RISK_COLUMNS + (['combined_risk'] if 'combined_risk' in columns else [])
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=np.float64, chunksize=chunk_rows):
+        yield {name: chunk[name].to_numpy() for name in usecols}
+
+
+class PortfolioSummary:
+    """Mergeable running totals over scored applicants."""
+
+    def __init__(self, table=premium_table, bins=SKETCH_BINS):
+        self.table = table
+        self.count = 0
+        self.risk_sums = {name: 0.0 for name in RISK_COLUMNS + ['combined_risk']}
+        self.premium_totals = {'min_premium': 0, 'max_premium': 0, 'premium': 0}
+        self.tier_counts = np.zeros(len(table.labels), dtype=np.int64)
+        self.sketch = np.zeros(bins, dtype=np.int64)
+        # Applicants with a NaN risk, left out of every other total
+        self.skipped = 0
+
+    def update(self, heart_risk, kidney_risk, diabetes_risk, combined_risk=None):
+        """
+        Add a chunk of scored applicants.
+
+        Args:
+            heart_risk, kidney_risk, diabetes_risk: Arrays of per-disease risks
+            combined_risk: Optional array of stored combined risks; computed
+                           with combine_risks() when omitted
+
+        Applicants with any NaN risk are only counted in skipped.
+        """
+        risks = [np.asarray(values, dtype=np.float64) for values in (heart_risk, kidney_risk, diabetes_risk)]
+        if combined_risk is None:
+            combined_risk = combine_risks(*risks)
+        risks.append(np.asarray(combined_risk, dtype=np.float64))
+        complete = ~np.logical_or.reduce([np.isnan(values) for values in risks])
+        if not complete.all():
+            self.skipped += len(complete) - int(np.count_nonzero(complete))
+            risks = [values[complete] for values in risks]
+        combined_risk = risks[-1]
+        quotes = self.table.quote(combined_risk, interpolate=True)
+
+        self.count += len(combined_risk)
+        for name, values in zip(self.risk_sums, risks):
+            self.risk_sums[name] += float(values.sum())
+        for name in self.premium_totals:
+            self.premium_totals[name] += int(quotes[name].sum())
+        self.tier_counts += np.bincount(quotes['tier_index'], minlength=len(self.tier_counts))
+
+        bins = np.clip((combined_risk * len(self.sketch)).astype(np.int64), 0, len(self.sketch) - 1)
+        self.sketch += np.bincount(bins, minlength=len(self.sketch))
+        return self
+
+    def update_chunks(self, chunks):
+        """Add every chunk from read_scored_chunks()."""
+        for chunk in chunks:
+            self.update(chunk['heart_risk'], chunk['kidney_risk'], chunk['diabetes_risk'],
+                        chunk.get('combined_risk'))
+        return self
+
+    def merge(self, other):
+        """Add the totals of another summary (e.g. of another shard)."""
+        if other.table.labels != self.table.labels or len(other.sketch) != len(self.sketch):
+            raise ValueError("Cannot merge summaries with different tiers or sketch sizes")
+        self.count += other.count
+        for name in self.risk_sums:
+            self.risk_sums[name] += other.risk_sums[name]
+        for name in self.premium_totals:
+            self.premium_totals[name] += other.premium_totals[name]
+        self.tier_counts += other.tier_counts
+        self.sketch += other.sketch
+        self.skipped += other.skipped
+        return self
+
+    def quantile(self, q):
+        """Approximate quantile of the combined risk (the middle of its sketch bin)."""
+        sketched = int(self.sketch.sum())
+        if sketched == 0:
+            return None
+        position = np.searchsorted(np.cumsum(self.sketch), q * sketched, side='left')
+        return (min(int(position), len(self.sketch) - 1) + 0.5) / len(self.sketch)
+
+    def to_dict(self):
+        """Return the summary as JSON-friendly data, readable by from_dict()."""
+        nonzero = np.flatnonzero(self.sketch)
+        return {
+            'count': self.count,
+            'mean_risk': {name: total / self.count if self.count else None
+                          for name, total in self.risk_sums.items()},
+            'risk_sums': dict(self.risk_sums),
+            'premium_totals': dict(self.premium_totals),
+            'tiers': [[label, int(count)] for label, count in zip(self.table.labels, self.tier_counts)],
+            'combined_risk_quantiles': {f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES},
+            'skipped': self.skipped,
+            # Only the non-empty bins, as [bin, count] pairs
+            'sketch': {'bins': len(self.sketch),
+                       'counts': [[int(i), int(self.sketch[i])] for i in nonzero]},
+        }
+
+    @classmethod
+    def from_dict(cls, data, table=premium_table):
+        """Rebuild a summary written by to_dict()."""
+        summary = cls(table, data['sketch']['bins'])
+        if [label for label, _ in data['tiers']] != table.labels:
+            raise ValueError("Summary was written with different premium tiers")
+        summary.count = data['count']
+        summary.risk_sums.update(data['risk_sums'])
+        summary.premium_totals.update(data['premium_totals'])
+        summary.tier_counts[:] = [count for _, count in data['tiers']]
+        for i, count in data['sketch']['counts']:
+            summary.sketch[i] = count
+        summary.skipped = data['skipped']
+        return summary
+
+
+def write_summary(summary, out_path):
+    if out_path:
+        with open(out_path, 'w') as f:
+            json.dump(summary.to_dict(), f)
+        print(f"Summary of {summary.count} applicants written to {out_path}")
+        return
+    report = summary.to_dict()
+    del report['sketch']
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate premiums and tiers over scored applicants")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    summarize_parser = subparsers.add_parser('summarize', help="summarize a scored applicants CSV")
+    summarize_parser.add_argument('path')
+    summarize_parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    summarize_parser.add_argument('--out', help="write the mergeable summary JSON here")
+
+    merge_parser = subparsers.add_parser('merge', help="merge summaries of several shards")
+    merge_parser.add_argument('paths', nargs='+')
+    merge_parser.add_argument('--out', help="write the merged summary JSON here")
+
+    args = parser.parse_args()
+    if args.command == 'summarize':
+        summary = PortfolioSummary().update_chunks(read_scored_chunks(args.path, args.chunk_rows))
+    else:
+        summary = PortfolioSummary()
+        for path in args.paths:
+            with open(path, 'r') as f:
+                summary.merge(PortfolioSummary.from_dict(json.load(f)))
+    write_summary(summary, args.out)
+
+
+if __name__ == '__main__':
+    main()
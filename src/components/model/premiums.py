@@ -0,0 +1,115 @@
+"""
+Insurance premium tiers and the vectorized quoting engine.
+
+The tiers are data: each has the largest risk percentage it covers, a label
+and the premium range in INR. PremiumTable prices whole arrays of risk
+scores with one np.searchsorted, and can also quote a single premium within
+the range by interpolating linearly between the tier's bounds.
+calculate_insurance_premium() in scoring.py is a thin wrapper over it.
+"""
+import bisect
+
+import numpy as np
+
+# (largest risk percentage, tier, min premium, max premium); the last tier
+# covers everything above the previous one, including NaN
+PREMIUM_TIERS = [
+    (10, "Very Low", 2000, 3000),
+    (20, "Low", 3000, 5000),
+    (30, "Low-Medium", 5000, 8000),
+    (40, "Medium", 8000, 12000),
+    (50, "Medium-High", 12000, 17000),
+    (60, "High", 17000, 22000),
+    (70, "High-Risk", 22000, 28000),
+    (80, "Very High", 28000, 35000),
+    (90, "Critical", 35000, 43000),
+    (100, "Extremely Critical", 43000, 53000),
+]
+
+
+class PremiumTable:
+    """Premium tiers as arrays, for quoting one or many risk scores."""
+
+    def __init__(self, tiers=PREMIUM_TIERS):
+        """
+        Args:
+            tiers: List of (largest risk percentage, tier, min premium, max
+                   premium), by increasing percentage, the last one 100
+
+        Raises:
+            ValueError: If the tiers do not cover 0-100% in increasing steps,
+                        or a tier's min premium exceeds its max
+        """
+        if not tiers:
+            raise ValueError("At least one premium tier is required")
+        upper = [float(tier[0]) for tier in tiers]
+        if not all(low < high for low, high in zip([0.0] + upper, upper)):
+            raise ValueError("Premium tiers must be sorted by increasing risk percentage, above 0")
+        if upper[-1] != 100:
+            raise ValueError("The last premium tier must end at a risk percentage of 100")
+        for _, label, min_premium, max_premium in tiers:
+            if not 0 <= min_premium <= max_premium:
+                raise ValueError(f"Premium tier {label!r} must have 0 <= min premium <= max premium")
+        self.labels = [tier[1] for tier in tiers]
+        self.min_premiums = np.array([tier[2] for tier in tiers], dtype=np.int64)
+        self.max_premiums = np.array([tier[3] for tier in tiers], dtype=np.int64)
+        # A percentage equal to an edge belongs to the tier below it
+        self.edges = np.array(upper[:-1], dtype=np.float64)
+        self.lower = np.array([0.0] + upper[:-1], dtype=np.float64)
+        self.upper = np.array(upper, dtype=np.float64)
+        self._labels = np.array(self.labels, dtype=object)
+        self._tiers = [(tier[1], int(tier[2]), int(tier[3])) for tier in tiers]
+        self._edge_list = self.edges.tolist()
+
+    def tier_index(self, risk_scores):
+        """Return the tier index of each risk score (0-1) in an array."""
+        risk_percentage = np.asarray(risk_scores, dtype=np.float64) * 100
+        # NaN sorts after every edge, into the last tier, as in the scalar ladder
+        return np.searchsorted(self.edges, risk_percentage, side='left')
+
+    def quote(self, risk_scores, interpolate=False):
+        """
+        Price an array of risk scores.
+
+        Args:
+            risk_scores: Array of risk scores between 0 and 1
+            interpolate: Also return a single premium per score, placed
+                         linearly between the tier's min and max premium by
+                         where the score falls within the tier
+
+        Returns:
+            Dict of arrays: 'tier_index', 'risk_tier' (labels), 'min_premium',
+            'max_premium' and, with interpolate, 'premium' (whole INR)
+        """
+        risk_scores = np.asarray(risk_scores, dtype=np.float64)
+        index = self.tier_index(risk_scores)
+        quotes = {
+            'tier_index': index,
+            'risk_tier': self._labels[index],
+            'min_premium': self.min_premiums[index],
+            'max_premium': self.max_premiums[index],
+        }
+        if interpolate:
+            lower, upper = self.lower[index], self.upper[index]
+            position = np.clip((risk_scores * 100 - lower) / (upper - lower), 0.0, 1.0)
+            # NaN scores are quoted at the top of their tier
+            position = np.where(np.isnan(position), 1.0, position)
+            span = self.max_premiums[index] - self.min_premiums[index]
+            quotes['premium'] = np.rint(self.min_premiums[index] + position * span).astype(np.int64)
+        return quotes
+
+    def quote_one(self, risk_score):
+        """
+        Price a single risk score.
+
+        Returns:
+            Tuple of (risk_tier, min_premium, max_premium)
+        """
+        risk_percentage = float(risk_score) * 100
+        if risk_percentage != risk_percentage:
+            return self._tiers[-1]
+        # Same tier as np.searchsorted(side='left') in tier_index()
+        return self._tiers[bisect.bisect_left(self._edge_list, risk_percentage)]
+
+
+premium_table = PremiumTable()
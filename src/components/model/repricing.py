@@ -0,0 +1,232 @@
+"""
+Repricing of stored applicants when the business parameters change.
+
+The combination weights, the high-risk override and the premium tiers are
+underwriting decisions. reprice() recomputes the combined risk, tier and
+premium of stored per-disease risks under new parameters in one vectorized
+pass, without running any disease model again. RepricingDiff compares the
+old and new pricing chunk by chunk and summarizes how many applicants
+changed tier, which moves they made and how the premium totals changed.
+Applicants with a missing (NaN) stored risk cannot be priced; they are
+counted as skipped and left out of the other totals, and written without a
+tier.
+
+    python repricing.py scored.csv new_pricing.json --out repriced.csv
+
+The pricing file is JSON with any of these keys; the ones left out keep
+their current values from scoring.py and premiums.py:
+
+    {"weights": {"heart": 0.45, "kidney": 0.35, "diabetes": 0.2},
+     "override_threshold": 0.9, "override_floor": 0.9,
+     "tiers": [[10, "Very Low", 2000, 3000], ...]}
+"""
+import argparse
+import json
+from collections import namedtuple
+
+import numpy as np
+
+import scoring
+from premiums import PremiumTable, PREMIUM_TIERS
+from portfolio import CHUNK_ROWS, RISK_COLUMNS, read_scored_chunks
+
+# Everything the combined risk and the premium depend on, besides the risks
+PricingParams = namedtuple('PricingParams', ['weights', 'override_threshold', 'override_floor', 'table'])
+
+
+def current_params():
+    """Return the pricing parameters the app uses now."""
+    return PricingParams((scoring.heart_weight, scoring.kidney_weight, scoring.diabetes_weight),
+                         scoring.HIGH_RISK_THRESHOLD, scoring.HIGH_RISK_FLOOR, PremiumTable(PREMIUM_TIERS))
+
+
+def load_params(path, base=None):
+    """
+    Read pricing parameters from a JSON file.
+
+    Args:
+        path: JSON file (see the module docstring)
+        base: PricingParams supplying the keys the file leaves out;
+              current_params() by default
+
+    Raises:
+        ValueError: If a weight is negative or they sum to zero, the
+                    override parameters are not between 0 and 1, or the
+                    tiers are invalid (see PremiumTable)
+    """
+    base = current_params() if base is None else base
+    with open(path, 'r') as f:
+        data = json.load(f)
+    weights = base.weights
+    if 'weights' in data:
+        weights = tuple(float(data['weights'].get(name, default))
+                        for name, default in zip(('heart', 'kidney', 'diabetes'), base.weights))
+    if not all(0 <= weight < np.inf for weight in weights) or sum(weights) <= 0:
+        raise ValueError(f"Weights must be finite and non-negative, with a positive total: {weights}")
+    override_threshold = float(data.get('override_threshold', base.override_threshold))
+    override_floor = float(data.get('override_floor', base.override_floor))
+    if not (0 <= override_threshold <= 1 and 0 <= override_floor <= 1):
+        raise ValueError("override_threshold and override_floor must be between 0 and 1")
+    table = PremiumTable([tuple(tier) for tier in data['tiers']]) if 'tiers' in data else base.table
+    return PricingParams(weights, override_threshold, override_floor, table)
+
+
+def reprice(heart_risk, kidney_risk, diabetes_risk, params, combined_risk=None):
+    """
+    Price stored per-disease risks under the given parameters.
+
+    Args:
+        heart_risk, kidney_risk, diabetes_risk: Arrays of stored risks
+        params: PricingParams
+        combined_risk: Optional stored combined risks to price as they are,
+                       instead of recombining the per-disease risks
+
+    Returns:
+        Dict of arrays: 'combined_risk', 'overridden', 'missing' and the
+        quote fields of PremiumTable.quote() (with the interpolated
+        'premium'). 'missing' marks the applicants whose combined risk is
+        NaN because a stored risk is; their quote fields mean nothing
+    """
+    heart_risk = np.asarray(heart_risk, dtype=np.float64)
+    kidney_risk = np.asarray(kidney_risk, dtype=np.float64)
+    if combined_risk is None:
+        combined_risk = scoring.combine_risks(heart_risk, kidney_risk, diabetes_risk, params.weights,
+                                              params.override_threshold, params.override_floor)
+    combined_risk = np.asarray(combined_risk, dtype=np.float64)
+    priced = params.table.quote(combined_risk, interpolate=True)
+    priced['combined_risk'] = combined_risk
+    priced['missing'] = np.isnan(combined_risk)
+    priced['overridden'] = (heart_risk > params.override_threshold) | (kidney_risk > params.override_threshold)
+    return priced
+
+
+class RepricingDiff:
+    """Running comparison of old and new pricing over chunks of applicants."""
+
+    def __init__(self, old_table, new_table):
+        self.old_labels = old_table.labels
+        self.new_labels = new_table.labels
+        # transitions[i, j]: applicants moved from old tier i to new tier j
+        self.transitions = np.zeros((len(self.old_labels), len(self.new_labels)), dtype=np.int64)
+        self.count = 0
+        # Applicants missing an old or a new combined risk, left out of the rest
+        self.skipped = 0
+        self.premium_increased = 0
+        self.premium_decreased = 0
+        self.overridden = {'old': 0, 'new': 0}
+        self.premium_totals = {side: {'min_premium': 0, 'max_premium': 0, 'premium': 0}
+                               for side in ('old', 'new')}
+        self.combined_risk_sums = {'old': 0.0, 'new': 0.0}
+
+    def update(self, old, new):
+        """Add a chunk priced by reprice() under the old and the new parameters."""
+        priced = ~(old['missing'] | new['missing'])
+        if not priced.all():
+            self.skipped += len(priced) - int(np.count_nonzero(priced))
+            old = {name: values[priced] for name, values in old.items()}
+            new = {name: values[priced] for name, values in new.items()}
+        self.count += len(old['combined_risk'])
+        n_new = self.transitions.shape[1]
+        self.transitions += np.bincount(old['tier_index'] * n_new + new['tier_index'],
+                                        minlength=self.transitions.size).reshape(self.transitions.shape)
+        self.premium_increased += int(np.count_nonzero(new['premium'] > old['premium']))
+        self.premium_decreased += int(np.count_nonzero(new['premium'] < old['premium']))
+        for side, priced in (('old', old), ('new', new)):
+            self.overridden[side] += int(np.count_nonzero(priced['overridden']))
+            for name in self.premium_totals[side]:
+                self.premium_totals[side][name] += int(priced[name].sum())
+            self.combined_risk_sums[side] += float(priced['combined_risk'].sum())
+        return self
+
+    def to_dict(self):
+        """Return the diff summary as JSON-friendly data."""
+        # Tiers are compared by label, so this also works when the new
+        # ladder renames, merges or splits tiers
+        changed = sum(int(count) for (i, j), count in np.ndenumerate(self.transitions)
+                      if self.old_labels[i] != self.new_labels[j])
+        return {
+            'count': self.count,
+            'skipped': self.skipped,
+            'tier_changed': changed,
+            'tier_unchanged': self.count - changed,
+            'premium_increased': self.premium_increased,
+            'premium_decreased': self.premium_decreased,
+            'overridden': dict(self.overridden),
+            'mean_combined_risk': {side: total / self.count if self.count else None
+                                   for side, total in self.combined_risk_sums.items()},
+            'premium_totals': {side: dict(totals) for side, totals in self.premium_totals.items()},
+            'transitions': [[self.old_labels[i], self.new_labels[j], int(count)]
+                            for (i, j), count in np.ndenumerate(self.transitions)
+                            if count and self.old_labels[i] != self.new_labels[j]],
+        }
+
+
+def reprice_chunks(chunks, new_params, old_params=None, writer=None):
+    """
+    Reprice chunks from read_scored_chunks().
+
+    The old pricing is the stored combined risk when the file has one, priced
+    with the old tiers, otherwise the per-disease risks priced under
+    old_params (current_params() by default).
+
+    Args:
+        writer: Optional callable receiving each chunk with its old and new
+                pricing
+
+    Returns:
+        RepricingDiff
+    """
+    old_params = current_params() if old_params is None else old_params
+    diff = RepricingDiff(old_params.table, new_params.table)
+    for chunk in chunks:
+        risks = [chunk[name] for name in RISK_COLUMNS]
+        old = reprice(*risks, old_params, chunk.get('combined_risk'))
+        new = reprice(*risks, new_params)
+        diff.update(old, new)
+        if writer is not None:
+            writer(chunk, old, new)
+    return diff
+
+
+class RepricedCsvWriter:
+    """Appends repriced rows to a CSV, chunk by chunk."""
+
+    def __init__(self, path):
+        self.path = path
+        self._header = True
+
+    def __call__(self, chunk, old, new):
+        import pandas as pd
+
+        rows = pd.DataFrame({name: chunk[name] for name in RISK_COLUMNS})
+        rows['combined_risk'] = new['combined_risk']
+        # Applicants that could not be priced are written without a tier
+        rows['risk_tier'] = pd.Series(new['risk_tier']).mask(new['missing'])
+        rows['min_premium'] = pd.Series(new['min_premium'], dtype='Int64').mask(new['missing'])
+        rows['max_premium'] = pd.Series(new['max_premium'], dtype='Int64').mask(new['missing'])
+        rows['previous_risk_tier'] = pd.Series(old['risk_tier']).mask(old['missing'])
+        rows.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprice stored applicants under new pricing parameters")
+    parser.add_argument('path', help="CSV of scored applicants (see portfolio.py)")
+    parser.add_argument('pricing', help="JSON file of the new pricing parameters")
+    parser.add_argument('--old-pricing', help="JSON file of the old parameters (default: the current ones)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--out', help="write the repriced rows to this CSV")
+    args = parser.parse_args()
+
+    try:
+        old_params = load_params(args.old_pricing) if args.old_pricing else current_params()
+        new_params = load_params(args.pricing, old_params)
+    except ValueError as e:
+        parser.error(str(e))
+    writer = RepricedCsvWriter(args.out) if args.out else None
+    diff = reprice_chunks(read_scored_chunks(args.path, args.chunk_rows), new_params, old_params, writer)
+    print(json.dumps(diff.to_dict(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Declarative rule tables for the rule-based disease risk scorers.
+
+Each table lists the fields a scorer reads, its terms (bucket edges and the
+contribution of each bucket, per-code lookups, capped linear terms and
+combined conditions), and the divisor used to normalize the summed score.
+compile_rules() turns a table into a RuleKernel that scores a whole array of
+patients with np.digitize and lookup arrays. The scalar scorers in scoring.py
+call the same kernels, so the single-request and batch paths cannot drift
+apart.
+
+A table whose fields are all yes/no flags except one bucketed field (the
+diabetes table: ten symptoms and gender, plus age) has a small finite input
+space. LookupKernel scores every combination once with the RuleKernel and
+then scores a patient by packing the flags and the age class into an index
+into that array.
+
+Term types:
+    buckets: value from 'values' picked by where the field falls between
+             'edges'. By default an edge belongs to the bucket above it
+             (x < edge); with 'right': True it belongs to the bucket below
+             it (x <= edge). NaN falls in bucket 'missing' (default 0).
+    lookup:  'values'[i] when the field equals 'codes'[i], otherwise 0.
+    linear:  min('cap', field * 'slope'); 'cap' when the field is NaN.
+    all:     'value' when every (field, op, threshold) condition holds.
+
+NaN handling follows the if/elif ladders the tables replaced: NaN fails
+every comparison, so it falls through to the ladder's last branch. For a
+ladder written from the top ('if age >= 60: ... elif age >= 40: ...') that
+is the first bucket; a ladder ending in an else ('if age < 40: ... else:')
+sets 'missing': -1.
+"""
+import bisect
+import operator
+
+import numpy as np
+
+HEART_RULES = {
+    'fields': ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
+               'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal'],
+    'terms': [
+        # Age risk (increases with age)
+        {'type': 'buckets', 'field': 'age', 'edges': [40, 50, 60, 70], 'values': [0.1, 0.2, 0.3, 0.4, 0.5],
+         'missing': -1},
+        # Sex risk (men typically have higher heart disease risk)
+        {'type': 'lookup', 'field': 'sex', 'codes': [1], 'values': [0.1]},
+        # Chest pain type: typical angina, atypical angina, non-anginal pain, asymptomatic
+        {'type': 'lookup', 'field': 'cp', 'codes': [0, 1, 2, 3], 'values': [0.3, 0.2, 0.1, 0.05]},
+        # Blood pressure risk
+        {'type': 'buckets', 'field': 'trestbps', 'edges': [120, 130, 140, 160], 'values': [0.05, 0.1, 0.2, 0.3, 0.4],
+         'missing': -1},
+        # Cholesterol risk
+        {'type': 'buckets', 'field': 'chol', 'edges': [200, 240], 'values': [0.05, 0.1, 0.3], 'missing': -1},
+        # High fasting blood sugar
+        {'type': 'lookup', 'field': 'fbs', 'codes': [1], 'values': [0.1]},
+        # Abnormal resting ECG
+        {'type': 'buckets', 'field': 'restecg', 'edges': [0], 'values': [0.0, 0.1], 'right': True},
+        # Maximum heart rate (higher max heart rate often indicates better fitness)
+        {'type': 'buckets', 'field': 'thalach', 'edges': [140, 160], 'values': [0.2, 0.1, 0.05], 'right': True},
+        # Exercise-induced angina
+        {'type': 'lookup', 'field': 'exang', 'codes': [1], 'values': [0.3]},
+        # ST depression risk
+        {'type': 'linear', 'field': 'oldpeak', 'slope': 0.1, 'cap': 0.3},
+        # Downsloping peak exercise ST segment
+        {'type': 'lookup', 'field': 'slope', 'codes': [2], 'values': [0.2]},
+        # Number of vessels risk
+        {'type': 'linear', 'field': 'ca', 'slope': 0.1, 'cap': 0.3},
+        # Abnormal thalassemia
+        {'type': 'buckets', 'field': 'thal', 'edges': [1], 'values': [0.0, 0.2], 'right': True},
+    ],
+    'divisor': 3.0,
+}
+
+KIDNEY_RULES = {
+    'fields': ['age', 'bp', 'sg', 'al', 'su', 'rbc', 'pc', 'pcc', 'ba', 'bgr', 'bu', 'sc'],
+    'terms': [
+        # Age risk (older = higher risk)
+        {'type': 'buckets', 'field': 'age', 'edges': [40, 60], 'values': [0.0, 0.1, 0.2]},
+        # Blood pressure risk
+        {'type': 'buckets', 'field': 'bp', 'edges': [130, 140], 'values': [0.0, 0.1, 0.2]},
+        # Albumin and sugar (higher = worse)
+        {'type': 'linear', 'field': 'al', 'slope': 0.06, 'cap': 0.3},
+        {'type': 'linear', 'field': 'su', 'slope': 0.04, 'cap': 0.2},
+        # Abnormal red blood cells / pus cells, present pus cell clumps / bacteria
+        {'type': 'lookup', 'field': 'rbc', 'codes': [1], 'values': [0.1]},
+        {'type': 'lookup', 'field': 'pc', 'codes': [1], 'values': [0.1]},
+        {'type': 'lookup', 'field': 'pcc', 'codes': [1], 'values': [0.1]},
+        {'type': 'lookup', 'field': 'ba', 'codes': [1], 'values': [0.1]},
+        # Blood glucose, blood urea and serum creatinine (higher = worse)
+        {'type': 'buckets', 'field': 'bgr', 'edges': [140, 200], 'values': [0.0, 0.1, 0.2], 'right': True},
+        {'type': 'buckets', 'field': 'bu', 'edges': [30, 40, 50], 'values': [0.0, 0.1, 0.2, 0.3], 'right': True},
+        {'type': 'buckets', 'field': 'sc', 'edges': [0.9, 1.2, 1.5], 'values': [0.0, 0.1, 0.2, 0.3], 'right': True},
+    ],
+    'divisor': 2.0,
+}
+
+DIABETES_RULES = {
+    'fields': ['age', 'gender', 'polyuria', 'polydipsia', 'sudden_weight_loss', 'weakness',
+               'polyphagia', 'genital_thrush', 'visual_blurring', 'itching', 'irritability',
+               'delayed_healing'],
+    'terms': [
+        # Age risk (older = higher risk)
+        {'type': 'buckets', 'field': 'age', 'edges': [30, 40, 60], 'values': [0.0, 0.05, 0.1, 0.2]},
+        # Gender (males slightly higher risk after age 50)
+        {'type': 'all', 'conditions': [('gender', '==', 1), ('age', '>=', 50)], 'value': 0.05},
+        # Major symptoms have higher weights
+        {'type': 'lookup', 'field': 'polyuria', 'codes': [1], 'values': [0.15]},
+        {'type': 'lookup', 'field': 'polydipsia', 'codes': [1], 'values': [0.15]},
+        {'type': 'lookup', 'field': 'sudden_weight_loss', 'codes': [1], 'values': [0.15]},
+        {'type': 'lookup', 'field': 'weakness', 'codes': [1], 'values': [0.1]},
+        {'type': 'lookup', 'field': 'polyphagia', 'codes': [1], 'values': [0.15]},
+        # Secondary symptoms
+        {'type': 'lookup', 'field': 'genital_thrush', 'codes': [1], 'values': [0.1]},
+        {'type': 'lookup', 'field': 'visual_blurring', 'codes': [1], 'values': [0.1]},
+        {'type': 'lookup', 'field': 'itching', 'codes': [1], 'values': [0.05]},
+        {'type': 'lookup', 'field': 'irritability', 'codes': [1], 'values': [0.05]},
+        {'type': 'lookup', 'field': 'delayed_healing', 'codes': [1], 'values': [0.1]},
+    ],
+    'divisor': 1.6,
+}
+
+_OPERATORS = {
+    '==': operator.eq, '>': operator.gt, '>=': operator.ge,
+    '<': operator.lt, '<=': operator.le,
+}
+
+
+def _compile_term(term, column):
+    """
+    Compile one term into a pair of functions computing its contribution:
+    one over the (n_fields, n_patients) columns of a batch, and one over the
+    feature list of a single patient. Both use the same edges and values and
+    the same float operations, so they give identical results.
+    """
+    kind = term['type']
+    if kind == 'buckets':
+        i = column[term['field']]
+        edges = np.asarray(term['edges'], dtype=np.float64)
+        values = np.asarray(term['values'], dtype=np.float64)
+        right = term.get('right', False)
+        if len(values) != len(edges) + 1:
+            raise ValueError(f"Bucket term on {term['field']} needs one more value than edges")
+        missing = range(len(values))[term.get('missing', 0)]
+        edge_list, value_list = edges.tolist(), values.tolist()
+        find = bisect.bisect_left if right else bisect.bisect_right
+
+        def bucket(cols):
+            x = cols[i]
+            index = np.digitize(x, edges, right=right)
+            # np.digitize puts NaN in the last bucket
+            if missing != len(edges):
+                index[np.isnan(x)] = missing
+            return values[index]
+
+        def bucket_one(features):
+            x = features[i]
+            return value_list[missing if x != x else find(edge_list, x)]
+        return bucket, bucket_one
+    if kind == 'lookup':
+        i = column[term['field']]
+        codes = np.asarray(term['codes'], dtype=np.float64)
+        # Last slot holds the contribution of any value that is not a listed code
+        values = np.append(np.asarray(term['values'], dtype=np.float64), 0.0)
+        order = np.argsort(codes)
+        codes, values[:-1] = codes[order], values[:-1][order]
+        table = dict(zip(codes.tolist(), values[:-1].tolist()))
+
+        def lookup(cols):
+            x = cols[i]
+            slot = np.minimum(np.searchsorted(codes, x), len(codes) - 1)
+            return values[np.where(codes[slot] == x, slot, len(codes))]
+        return lookup, (lambda features: table.get(features[i], 0.0))
+    if kind == 'linear':
+        i = column[term['field']]
+        slope, cap = term['slope'], term['cap']
+        # np.fmin, like min(), returns the cap when the product is NaN
+        return (lambda cols: np.fmin(cap, cols[i] * slope)), (lambda features: min(cap, features[i] * slope))
+    if kind == 'all':
+        conditions = [(column[field], _OPERATORS[op], threshold) for field, op, threshold in term['conditions']]
+        value = term['value']
+
+        def all_conditions(cols):
+            hit = np.ones(cols.shape[1], dtype=bool)
+            for i, op, threshold in conditions:
+                hit &= op(cols[i], threshold)
+            return np.where(hit, value, 0.0)
+
+        def all_conditions_one(features):
+            return value if all(op(features[i], threshold) for i, op, threshold in conditions) else 0.0
+        return all_conditions, all_conditions_one
+    raise ValueError(f"Unknown rule term type: {kind}")
+
+
+class RuleKernel:
+    """Scorer compiled from a rule table, for batches and for single patients."""
+
+    def __init__(self, table):
+        self.fields = list(table['fields'])
+        self.divisor = table['divisor']
+        column = {name: i for i, name in enumerate(self.fields)}
+        compiled = [_compile_term(term, column) for term in table['terms']]
+        self._terms = [batch for batch, _ in compiled]
+        self._scalar_terms = [one for _, one in compiled]
+
+    def __call__(self, X):
+        """
+        Score patients without the jitter.
+
+        Args:
+            X: Array of shape (n_patients, n_fields) with columns in 'fields' order
+
+        Returns:
+            Array of n_patients scores between 0 and 1
+        """
+        cols = np.asarray(X, dtype=np.float64).T
+        if cols.ndim != 2 or cols.shape[0] != len(self.fields):
+            raise ValueError(f"Expected rows of {len(self.fields)} features: {', '.join(self.fields)}")
+        risk_score = np.zeros(cols.shape[1], dtype=np.float64)
+        # Terms are added in table order, the same order as the original ladders
+        for term in self._terms:
+            risk_score += term(cols)
+        # Normalize to 0-1 range
+        return np.minimum(1.0, risk_score / self.divisor)
+
+    def score_one(self, features):
+        """
+        Score a single patient without the jitter.
+
+        Gives exactly the same result as calling the kernel on a one-row
+        array, without NumPy's per-call overhead.
+        """
+        if len(features) != len(self.fields):
+            raise ValueError(f"Expected {len(self.fields)} features: {', '.join(self.fields)}")
+        features = [float(x) for x in features]
+        risk_score = 0.0
+        for term in self._scalar_terms:
+            risk_score += term(features)
+        return min(1.0, risk_score / self.divisor)
+
+
+class LookupKernel:
+    """
+    Exhaustive lookup table of a RuleKernel, for rule tables whose fields are
+    flags except for one bucketed field.
+
+    A flag counts as set when it equals 1, like the 'codes': [1] lookup
+    terms. The bucketed field is reduced to its class: how many of the
+    thresholds used by the table's terms it reaches, with NaN as a class of
+    its own.
+    """
+
+    def __init__(self, table, bucket_field):
+        kernel = compile_rules(table)
+        self.fields = kernel.fields
+        self.divisor = kernel.divisor
+        self.bucket_field = bucket_field
+        self._bucket_column = self.fields.index(bucket_field)
+        self._flag_columns = [i for i, name in enumerate(self.fields) if name != bucket_field]
+        self.thresholds = self._thresholds(table, bucket_field)
+
+        # One representative value per class of the bucketed field; NaN last
+        edges = self.thresholds
+        representatives = [edges[0] - 1.0] + edges + [np.nan]
+        n_flags = len(self._flag_columns)
+        self._n_classes = len(representatives)
+        flags = (np.arange(1 << n_flags)[:, None] >> np.arange(n_flags)) & 1
+        X = np.empty((self._n_classes << n_flags, len(self.fields)), dtype=np.float64)
+        for bucket, value in enumerate(representatives):
+            rows = slice(bucket << n_flags, (bucket + 1) << n_flags)
+            X[rows, self._flag_columns] = flags
+            X[rows, self._bucket_column] = value
+        self.table = kernel(X)
+        self._table_list = self.table.tolist()
+        self._edges = np.asarray(edges, dtype=np.float64)
+        # Bit value of each column, 0 for the bucketed field, so the flags are
+        # packed without copying them out of X first
+        self._weights = np.zeros(len(self.fields), dtype=np.int32)
+        self._weights[self._flag_columns] = 1 << np.arange(n_flags)
+
+    @staticmethod
+    def _thresholds(table, bucket_field):
+        # Every term must read the flags as flags and split the bucketed field
+        # at 'x >= threshold' boundaries, so a class and the flags determine
+        # the score
+        thresholds = set()
+        for term in table['terms']:
+            kind = term['type']
+            if kind == 'buckets' and term['field'] == bucket_field and not term.get('right', False):
+                thresholds.update(term['edges'])
+            elif kind == 'lookup' and term['field'] != bucket_field and list(term['codes']) == [1]:
+                continue
+            elif kind == 'all':
+                for field, op, threshold in term['conditions']:
+                    if field == bucket_field and op in ('>=', '<'):
+                        thresholds.add(threshold)
+                    elif field == bucket_field or (op, threshold) != ('==', 1):
+                        raise ValueError(f"Condition {field} {op} {threshold} cannot be tabulated")
+            else:
+                raise ValueError(f"Term {term} cannot be tabulated")
+        return sorted(float(t) for t in thresholds)
+
+    def index(self, X):
+        """Return the table index of each row of an (n_patients, n_fields) array."""
+        X = np.asarray(X, dtype=np.float64)
+        bucket_values = X[:, self._bucket_column]
+        buckets = np.searchsorted(self._edges, bucket_values, side='right')
+        buckets[np.isnan(bucket_values)] = self._n_classes - 1
+        bits = (X == 1).view(np.uint8) @ self._weights
+        return (buckets << len(self._flag_columns)) | bits
+
+    def __call__(self, X):
+        """Score patients without the jitter; same result as the RuleKernel."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.fields):
+            raise ValueError(f"Expected rows of {len(self.fields)} features: {', '.join(self.fields)}")
+        return self.table[self.index(X)]
+
+    def score_one(self, features):
+        """Score a single patient without the jitter."""
+        if len(features) != len(self.fields):
+            raise ValueError(f"Expected {len(self.fields)} features: {', '.join(self.fields)}")
+        index = 0
+        for bit, i in enumerate(self._flag_columns):
+            if features[i] == 1:
+                index |= 1 << bit
+        value = float(features[self._bucket_column])
+        bucket = self._n_classes - 1 if value != value else bisect.bisect_right(self.thresholds, value)
+        return self._table_list[(bucket << len(self._flag_columns)) | index]
+
+
+def compile_rules(table):
+    """Compile a rule table into a RuleKernel."""
+    return RuleKernel(table)
+
+
+heart_kernel = compile_rules(HEART_RULES)
+kidney_kernel = compile_rules(KIDNEY_RULES)
+diabetes_kernel = compile_rules(DIABETES_RULES)
+# 2^11 flag combinations x 6 age classes (5 from the 30/40/50/60 thresholds, plus NaN)
+diabetes_lookup = LookupKernel(DIABETES_RULES, 'age')
@@ -0,0 +1,279 @@
+"""
+Risk scoring shared by the form routes and the JSON API.
+
+Holds the rule-based scorers for each disease, the weights used to combine
+them, and the insurance premium lookup. The rule-based scorers are defined as
+data in rules.py; each has a scalar form for the form routes and a batch form
+that scores an array of patients in one vectorized pass, both evaluated by
+the same compiled kernel (for diabetes, the same precomputed lookup table).
+
+The slight jitter added to the rule-based scores is derived from a hash of
+the quantized features (see caching.py) rather than drawn at random, so the
+same patient always gets the same score.
+"""
+import numpy as np
+
+from rules import heart_kernel, kidney_kernel, diabetes_lookup
+from features import Field, FieldSchema
+from premiums import premium_table
+from caching import quantize, quantize_one, feature_hash, feature_hash_one, hash_seed, hash_to_unit
+
+# Add model accuracy variables 
+# These would be determined during model training/validation in a production system
+heart_accuracy = 0.85   # Heart disease model accuracy (85%)
+kidney_accuracy = 0.78  # Kidney disease model accuracy (78%)
+diabetes_accuracy = 0.82 # Diabetes model accuracy (82%)
+
+# Add model priority weights (not just accuracy but also priority)
+# Heart disease given highest priority, then kidney, then diabetes
+heart_weight = 0.50     # Heart disease has 50% of total weight
+kidney_weight = 0.30    # Kidney disease has 30% of total weight
+diabetes_weight = 0.20  # Diabetes has 20% of total weight
+
+# Heart or kidney (but not diabetes) risk above this threshold raises the
+# combined risk to at least the floor
+HIGH_RISK_THRESHOLD = 0.9
+HIGH_RISK_FLOOR = 0.9
+
+# Share of the diabetes model in the diabetes risk when the model is served.
+# The model reads the BRFSS health indicators and not the symptoms on the
+# form, so its risk is blended with the rule-based score, which does
+DIABETES_MODEL_WEIGHT = 0.5
+
+# Largest jitter added to or taken from a rule-based score
+JITTER = 0.05
+HEART_SEED = hash_seed('heart')
+KIDNEY_SEED = hash_seed('kidney')
+DIABETES_SEED = hash_seed('diabetes')
+
+
+def _jitter_one(features, seed):
+    # Deterministic jitter in [-JITTER, JITTER) for one patient
+    return (2.0 * hash_to_unit(feature_hash_one(quantize_one(features), seed)) - 1.0) * JITTER
+
+def calculate_rule_based_heart_risk(features):
+    """
+    Calculate a rule-based heart disease risk score based on established clinical factors.
+    Used as a fallback when the model is unavailable or gives suspicious results.
+    
+    Args:
+        features: List of heart disease features [age, sex, cp, trestbps, chol, fbs, restecg, 
+                                                 thalach, exang, oldpeak, slope, ca, thal]
+    
+    Returns:
+        Float between 0 and 1 representing risk (higher = higher risk)
+    """
+    # Deterministic part of the score, from the rule table in rules.py
+    risk_score = heart_kernel.score_one(features)
+    
+    # Add slight jitter, derived from the features so it is reproducible
+    risk_score = max(0.0, min(1.0, risk_score + _jitter_one(features, HEART_SEED)))
+    
+    return risk_score
+
+# Function to calculate kidney risk based on rules (fallback mechanism)
+def calculate_rule_based_kidney_risk(features):
+    """
+    Calculate a risk score for kidney disease based on clinical factors
+    
+    Parameters:
+    - features: list containing [age, bp, sg, al, su, rbc, pc, pcc, ba, bgr, bu, sc]
+    
+    Returns:
+    - float: risk score between 0-1
+    """
+    # Deterministic part of the score, from the rule table in rules.py
+    risk_score = kidney_kernel.score_one(features)
+    
+    # Add slight jitter, derived from the features so it is reproducible
+    risk_score = max(0.0, min(1.0, risk_score + _jitter_one(features, KIDNEY_SEED)))
+    
+    return risk_score
+
+# Function to calculate diabetes risk based on rules (fallback mechanism)
+def calculate_rule_based_diabetes_risk(features):
+    """
+    Calculate a risk score for diabetes based on clinical factors
+    
+    Parameters:
+    - features: list containing [age, gender, polyuria, polydipsia, sudden_weight_loss, weakness, 
+                               polyphagia, genital_thrush, visual_blurring, itching, irritability, 
+                               delayed_healing]
+    
+    Returns:
+    - float: risk score between 0-1
+    """
+    # Deterministic part of the score, precomputed for every combination of
+    # symptoms, gender and age class (see LookupKernel in rules.py)
+    risk_score = diabetes_lookup.score_one(features)
+    
+    # Add slight jitter, derived from the features so it is reproducible
+    risk_score = max(0.0, min(1.0, risk_score + _jitter_one(features, DIABETES_SEED)))
+    
+    return risk_score
+
+# Add a function to calculate insurance premium
+def calculate_insurance_premium(risk_score):
+    """
+    Calculate insurance premium based on the risk score percentage:
+    
+    1-10%: INR 2,000-3,000
+    11-20%: INR 3,000-5,000
+    21-30%: INR 5,000-8,000
+    31-40%: INR 8,000-12,000
+    41-50%: INR 12,000-17,000
+    51-60%: INR 17,000-22,000
+    61-70%: INR 22,000-28,000
+    71-80%: INR 28,000-35,000
+    81-90%: INR 35,000-43,000
+    91-100%: INR 43,000-53,000
+    
+    The tiers are defined in premiums.py; use premium_table.quote() to price
+    an array of scores at once.
+    
+    Returns a tuple of (risk_tier, min_premium, max_premium)
+    """
+    return premium_table.quote_one(risk_score)
+
+# Form fields of each disease, in the order the scorers expect them: the
+# default used when a value is missing or not a number, the valid range
+# (values outside it are clamped) and dtype
+HEART_SCHEMA = FieldSchema([
+    Field('age', 50.0, 0, 120, 'float'),
+    Field('sex', 0.0, 0, 1, 'int'),
+    Field('cp', 0.0, 0, 3, 'int'),
+    Field('trestbps', 120.0, 50, 250, 'float'),
+    Field('chol', 200.0, 50, 700, 'float'),
+    Field('fbs', 0.0, 0, 1, 'int'),
+    Field('restecg', 0.0, 0, 2, 'int'),
+    Field('thalach', 150.0, 40, 250, 'float'),
+    Field('exang', 0.0, 0, 1, 'int'),
+    Field('oldpeak', 0.0, 0, 10, 'float'),
+    Field('slope', 0.0, 0, 2, 'int'),
+    Field('ca', 0.0, 0, 4, 'int'),
+    Field('thal', 0.0, 0, 3, 'int'),
+])
+KIDNEY_SCHEMA = FieldSchema([
+    Field('age', 50.0, 0, 120, 'float'),
+    Field('bp', 120.0, 40, 250, 'float'),
+    Field('sg', 1.015, 1.0, 1.05, 'float'),
+    Field('al', 0.0, 0, 5, 'int'),
+    Field('su', 0.0, 0, 5, 'int'),
+    Field('rbc', 0.0, 0, 1, 'int'),
+    Field('pc', 0.0, 0, 1, 'int'),
+    Field('pcc', 0.0, 0, 1, 'int'),
+    Field('ba', 0.0, 0, 1, 'int'),
+    Field('bgr', 120.0, 20, 600, 'float'),
+    Field('bu', 30.0, 1, 400, 'float'),
+    Field('sc', 1.0, 0.1, 80, 'float'),
+])
+DIABETES_SCHEMA = FieldSchema([
+    Field('age', 40.0, 0, 120, 'float'),
+    Field('gender', 0.0, 0, 1, 'int'),
+    Field('polyuria', 0.0, 0, 1, 'int'),
+    Field('polydipsia', 0.0, 0, 1, 'int'),
+    Field('sudden_weight_loss', 0.0, 0, 1, 'int'),
+    Field('weakness', 0.0, 0, 1, 'int'),
+    Field('polyphagia', 0.0, 0, 1, 'int'),
+    Field('genital_thrush', 0.0, 0, 1, 'int'),
+    Field('visual_blurring', 0.0, 0, 1, 'int'),
+    Field('itching', 0.0, 0, 1, 'int'),
+    Field('irritability', 0.0, 0, 1, 'int'),
+    Field('delayed_healing', 0.0, 0, 1, 'int'),
+])
+
+
+def _add_jitter(risk_score, X, seed):
+    # Same jitter as the scalar scorers, for every patient
+    jitter = (2.0 * hash_to_unit(feature_hash(quantize(X), seed)) - 1.0) * JITTER
+    return np.clip(risk_score + jitter, 0.0, 1.0)
+
+
+def calculate_rule_based_heart_risk_batch(X):
+    """
+    Vectorized calculate_rule_based_heart_risk.
+    
+    Args:
+        X: Array of shape (n_patients, 13) with columns in HEART_SCHEMA order
+    
+    Returns:
+        Array of n_patients risk scores between 0 and 1
+    """
+    return _add_jitter(heart_kernel(X), X, HEART_SEED)
+
+
+def calculate_rule_based_kidney_risk_batch(X):
+    """
+    Vectorized calculate_rule_based_kidney_risk.
+    
+    Args:
+        X: Array of shape (n_patients, 12) with columns in KIDNEY_SCHEMA order
+    
+    Returns:
+        Array of n_patients risk scores between 0 and 1
+    """
+    return _add_jitter(kidney_kernel(X), X, KIDNEY_SEED)
+
+
+def calculate_rule_based_diabetes_risk_batch(X):
+    """
+    Vectorized calculate_rule_based_diabetes_risk.
+    
+    Args:
+        X: Array of shape (n_patients, 12) with columns in DIABETES_SCHEMA order
+    
+    Returns:
+        Array of n_patients risk scores between 0 and 1
+    """
+    return _add_jitter(diabetes_lookup(X), X, DIABETES_SEED)
+
+
+def blend_diabetes_risk(model_risk, rule_risk, model_weight=DIABETES_MODEL_WEIGHT):
+    """
+    Combine the diabetes model's risk with the rule-based (symptom) risk.
+    
+    Works on scalars and on arrays of patients.
+    
+    Returns:
+        Blended risk (a NumPy scalar or array)
+    """
+    model_risk = np.asarray(model_risk, dtype=np.float64)
+    rule_risk = np.asarray(rule_risk, dtype=np.float64)
+    return model_weight * model_risk + (1.0 - model_weight) * rule_risk
+
+
+def combine_risks(heart_risk, kidney_risk, diabetes_risk, weights=None,
+                  threshold=HIGH_RISK_THRESHOLD, floor=HIGH_RISK_FLOOR):
+    """
+    Combine the per-disease risks into the weighted overall risk.
+    
+    If heart or kidney risk (but not diabetes) exceeds the threshold (90%),
+    the combined risk is raised to at least the floor (90%). Works on scalars
+    and on arrays of patients.
+    
+    Args:
+        heart_risk, kidney_risk, diabetes_risk: Per-disease risks
+        weights: Optional (heart, kidney, diabetes) weights; the module's
+                 weights by default. Other values are used to reprice stored
+                 risks (see repricing.py)
+        threshold, floor: High-risk override parameters
+    
+    Returns:
+        Weighted risk (a NumPy scalar or array)
+    """
+    heart_risk = np.asarray(heart_risk, dtype=np.float64)
+    kidney_risk = np.asarray(kidney_risk, dtype=np.float64)
+    diabetes_risk = np.asarray(diabetes_risk, dtype=np.float64)
+    if weights is None:
+        weights = (heart_weight, kidney_weight, diabetes_weight)
+    w_heart, w_kidney, w_diabetes = weights
+    
+    total_weight = w_heart + w_kidney + w_diabetes
+    weighted_risk = (
+        (heart_risk * w_heart) + 
+        (kidney_risk * w_kidney) + 
+        (diabetes_risk * w_diabetes)
+    ) / total_weight
+    
+    has_extremely_high_risk = (heart_risk > threshold) | (kidney_risk > threshold)
+    return np.where(has_extremely_high_risk, np.maximum(weighted_risk, floor), weighted_risk)
@@ -0,0 +1,196 @@
+"""
+Production entry point: preload the models in a master process, then fork.
+
+    python serve.py --workers 4 --port 5000
+
+The master imports predict.py, loads and warms every model, and calls
+gc.freeze() before forking the gunicorn workers. The workers then share the
+model state copy-on-write: freezing moves all objects that exist at fork
+time into the permanent generation, so the workers' garbage collector never
+writes to them and their pages stay shared. There is no reloader.
+
+With --async the workers run an asyncio event loop (uvicorn) in front of
+the Flask app. The event loop reads request bodies of up to
+CARDIALINK_BUFFER_BYTES (default 1 MiB) in full before the app sees them,
+so slow uploads hold an idle connection rather than a thread. Larger bodies
+(such as NDJSON batch uploads) are streamed to the app once that much has
+arrived, so they are still parsed while they are uploaded. Bodies over the
+app's MAX_CONTENT_LENGTH are refused with 413 in both modes.
+The app itself runs on a pool of --threads threads per worker (a2wsgi), so
+a worker serves as many requests at once as in the default mode, with its
+API model calls on the bounded scoring pool (see api.py).
+This mode needs the optional packages in requirements-async.txt.
+
+To see how much memory each worker shares with the master versus holds
+privately:
+
+    python serve.py --report <master pid>
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import sys
+
+from memory_report import format_memory, process_memory, worker_memory_report
+
+# Request bodies up to this size are read by the event loop before the app
+# runs (--async only); override with CARDIALINK_BUFFER_BYTES
+BUFFER_BYTES = int(os.environ.get('CARDIALINK_BUFFER_BYTES', 1024 * 1024))
+
+
+def _content_length(scope):
+    for name, value in scope['headers']:
+        if name == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+class BufferedBody:
+    """
+    ASGI middleware that reads the request body before calling the app.
+
+    Bodies of up to buffer_bytes are read in full. A longer body with a
+    Content-Length is passed on once buffer_bytes have arrived and the rest
+    is streamed to the app. A body without one (chunked) is read in full and
+    given a Content-Length, since the WSGI app only reads bodies of known
+    length. Bodies over max_bytes are refused with 413.
+    """
+
+    def __init__(self, app, max_bytes=None, buffer_bytes=BUFFER_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.buffer_bytes = buffer_bytes
+
+    async def _too_large(self, send):
+        # Sent without reading the rest of the body, so the connection is closed
+        body = json.dumps({'error': f'Request body larger than {self.max_bytes} bytes'}).encode()
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode()),
+                                (b'connection', b'close')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        content_length = _content_length(scope)
+        if self.max_bytes is not None and content_length is not None and content_length > self.max_bytes:
+            return await self._too_large(send)
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.request':
+                size += len(message.get('body', b''))
+                if self.max_bytes is not None and size > self.max_bytes:
+                    return await self._too_large(send)
+            messages.append(message)
+            if message['type'] != 'http.request' or not message.get('more_body', False):
+                if content_length is None and message['type'] == 'http.request':
+                    # Werkzeug ignores Content-Length on a chunked request
+                    headers = [(name, value) for name, value in scope['headers'] if name != b'transfer-encoding']
+                    scope = dict(scope, headers=headers + [(b'content-length', str(size).encode())])
+                break
+            if content_length is not None and size >= self.buffer_bytes:
+                # Stream the rest; the app enforces its MAX_CONTENT_LENGTH as it reads
+                break
+        buffered = iter(messages)
+
+        async def replay():
+            # The buffered body, then the rest of it or whatever comes next (a disconnect)
+            for message in buffered:
+                return message
+            return await receive()
+        return await self.app(scope, replay, send)
+
+
+def load_app(asgi=False, threads=4):
+    """
+    Import the app and warm all models; runs once in the master.
+
+    Args:
+        asgi: Wrap the WSGI app for an ASGI server
+        threads: Size of the thread pool the wrapped app runs on
+    """
+    # Disable collection while the long-lived state is built, then freeze it
+    gc.disable()
+    from predict import app, warm_models
+    warm_models()
+    if asgi:
+        # Not asgiref's WsgiToAsgi: it runs every request on one shared thread.
+        # The pool's threads are only started on first use, in the workers
+        from a2wsgi import WSGIMiddleware
+        app = BufferedBody(WSGIMiddleware(app, workers=threads), max_bytes=app.config['MAX_CONTENT_LENGTH'])
+    gc.freeze()
+    print(f"Models loaded in master (pid {os.getpid()}), {gc.get_freeze_count()} objects frozen")
+    return app
+
+
+def post_fork(server, worker):
+    # Objects created from here on are the worker's own; collect them normally
+    gc.enable()
+
+
+def post_worker_init(worker):
+    worker.log.info(format_memory(os.getpid(), process_memory()))
+
+
+def run(args):
+    from gunicorn.app.base import BaseApplication
+
+    class CardiaLinkApplication(BaseApplication):
+        def load_config(self):
+            settings = {
+                'bind': f"{args.host}:{args.port}",
+                'workers': args.workers,
+                'worker_class': 'uvicorn_worker.UvicornWorker' if args.use_async else 'gthread',
+                'threads': args.threads,
+                'keepalive': args.keepalive,
+                'preload_app': True,
+                'reload': False,
+                'post_fork': post_fork,
+                'post_worker_init': post_worker_init,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app(asgi=args.use_async, threads=args.threads)
+
+    CardiaLinkApplication().run()
+
+
+def report(master_pid):
+    for pid, memory in worker_memory_report(master_pid).items():
+        print(format_memory(pid, memory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the CardiaLink risk assessment app")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=4,
+                        help="threads per worker running requests (with --async, the app's thread pool)")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="serve from an asyncio event loop per worker (needs requirements-async.txt)")
+    parser.add_argument('--keepalive', type=int, default=5,
+                        help="seconds to keep idle client connections open")
+    parser.add_argument('--report', type=int, metavar='MASTER_PID',
+                        help="print shared/private memory of a running master and its workers")
+    args = parser.parse_args()
+
+    if args.report is not None:
+        report(args.report)
+        return
+    run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
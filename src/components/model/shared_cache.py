@@ -0,0 +1,107 @@
+"""
+Result table shared by every worker process on a host.
+
+The table is a fixed-size open-addressing hash table of 64-bit key hashes
+and float results in an anonymous shared memory mapping. It is created when
+the module is first imported; serve.py imports the app in the master before
+forking, so all workers map the same pages and a result computed by one
+worker is a hit in every other. Memory is bounded by the number of slots
+(32 bytes each) and never grows.
+
+Each key probes PROBES consecutive slots. An insert takes the slot already
+holding the key, else a free or expired slot, else evicts the entry that
+expires soonest. There is no lock: every slot stores a checksum of its key,
+value and expiry, and a slot that another process is writing at the same
+time fails the checksum and reads as a miss.
+"""
+import mmap
+import time
+
+import numpy as np
+
+# Consecutive slots searched for a key
+PROBES = 8
+
+# Slot layout: key hash (0 = empty), checksum, value bits, expiry time bits
+_KEY, _CHECK, _VALUE, _EXPIRY = range(4)
+_CHECK_SALT = np.uint64(0x5bd1e9955bd1e995)
+
+
+class SharedResultTable:
+    """Fixed-size table of (key hash -> float) entries with a time-to-live."""
+
+    def __init__(self, slots, ttl_seconds):
+        # Round up to a power of two, so a probe position is a bit mask
+        self.slots = 1 << max(PROBES - 1, int(slots) - 1).bit_length()
+        self.ttl_seconds = ttl_seconds
+        self._mask = np.uint64(self.slots - 1)
+        # Anonymous mappings are MAP_SHARED, so forked children share them
+        self._buffer = mmap.mmap(-1, self.slots * 4 * 8)
+        self._table = np.frombuffer(self._buffer, dtype=np.uint64).reshape(self.slots, 4)
+
+    @property
+    def nbytes(self):
+        return self._table.nbytes
+
+    def _probe(self, hashes):
+        # (n, PROBES) slot indexes of each key
+        offsets = np.arange(PROBES, dtype=np.uint64)
+        return ((hashes[:, None] + offsets) & self._mask).astype(np.intp)
+
+    def get_many(self, hashes):
+        """
+        Look up key hashes.
+
+        Args:
+            hashes: uint64 array of nonzero key hashes
+
+        Returns:
+            Tuple of (bool array, True where the key was found; float64 array
+            of the values found)
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        rows = self._table[self._probe(hashes)]
+        keys, checks, value_bits, expiry_bits = (rows[:, :, field] for field in (_KEY, _CHECK, _VALUE, _EXPIRY))
+        valid = ((keys == hashes[:, None])
+                 & (checks == (keys ^ value_bits ^ expiry_bits ^ _CHECK_SALT))
+                 & (expiry_bits.view(np.float64) > time.time()))
+        found = valid.any(axis=1)
+        values = value_bits.view(np.float64)[np.arange(len(hashes)), valid.argmax(axis=1)]
+        return found, values
+
+    def put_many(self, hashes, values):
+        """
+        Insert or replace entries.
+
+        Returns:
+            Number of live entries of other keys that were evicted
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        value_bits = np.asarray(values, dtype=np.float64).view(np.uint64)
+        expiry = time.time() + self.ttl_seconds
+        slots = self._probe(hashes)
+        rows = self._table[slots]
+        keys = rows[:, :, _KEY]
+        slot_expiry = rows[:, :, _EXPIRY].view(np.float64)
+        # Prefer the key's own slot, then a free or expired slot, then the
+        # live entry that expires soonest
+        live = (keys != 0) & (slot_expiry > time.time())
+        cost = np.where(live, slot_expiry, -1.0)
+        cost[keys == hashes[:, None]] = -2.0
+        choice = cost.argmin(axis=1)
+        chosen = np.arange(len(hashes))
+        evicted = int(np.count_nonzero(live[chosen, choice] & (keys[chosen, choice] != hashes)))
+        slots = slots[chosen, choice]
+
+        expiry_bits = np.full(len(hashes), expiry, dtype=np.float64).view(np.uint64)
+        table = self._table
+        # Invalidate the slot before rewriting it, then publish the checksum last
+        table[slots, _CHECK] = 0
+        table[slots, _KEY] = hashes
+        table[slots, _VALUE] = value_bits
+        table[slots, _EXPIRY] = expiry_bits
+        table[slots, _CHECK] = hashes ^ value_bits ^ expiry_bits ^ _CHECK_SALT
+        return evicted
+
+    def clear(self):
+        self._table[:] = 0
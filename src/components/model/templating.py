@@ -0,0 +1,40 @@
+"""
+Jinja setup for the web app's page templates.
+
+The templates live in templates/ and are loaded through Flask's
+FileSystemLoader-backed environment, which compiles each template once per
+process and keeps it in memory (render_template_string compiled the whole
+template again on every request). Compiled bytecode can additionally be
+written to a cache directory at build time, so worker processes skip the
+parse and compile step even for their first render.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+from artifacts import ARTIFACT_DIR
+
+TEMPLATE_CACHE_DIR = os.path.join(ARTIFACT_DIR, 'jinja')
+
+
+def configure_templates(app, cache_dir=TEMPLATE_CACHE_DIR):
+    """
+    Use the bytecode cache in cache_dir for the app's templates.
+
+    Must be called before the app's Jinja environment is first used.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(cache_dir))
+
+
+def precompile_templates(app):
+    """
+    Compile every template of the app, writing its bytecode to the cache.
+
+    Returns:
+        List of the compiled template names
+    """
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
@@ -0,0 +1,186 @@
+"""
+Tests of the feature keys and the per-process result cache (caching.py), and
+of the deterministic jitter of the rule-based scorers built on them.
+
+    python -m pytest test_caching.py
+"""
+import types
+
+import numpy as np
+import pytest
+
+import caching
+from caching import ResultCache, quantize, quantize_one, feature_hash, feature_hash_one
+from metrics import metrics
+from shared_cache import SharedResultTable
+from scoring import (JITTER, HEART_SEED, KIDNEY_SEED, DIABETES_SEED, _add_jitter, _jitter_one,
+                     calculate_rule_based_heart_risk, calculate_rule_based_heart_risk_batch,
+                     calculate_rule_based_kidney_risk, calculate_rule_based_kidney_risk_batch,
+                     calculate_rule_based_diabetes_risk, calculate_rule_based_diabetes_risk_batch)
+
+NAN = float('nan')
+
+
+def _rows(n_features, n=500, seed=0):
+    # Typical values, values on the quantization grid and halfway between
+    # its points, negatives, huge values, NaN and infinities
+    rng = np.random.default_rng(seed)
+    special = np.array([0.0, -0.0, 1.0, 1.015, 0.0005, 0.0015, -0.0025, 2.5e-4, 119.9995,
+                        1e17, -1e300, NAN, np.inf, -np.inf])
+    scale = 10.0 ** rng.integers(0, 5, size=(n, 1))
+    X = np.round(rng.uniform(-5, 250, size=(n, n_features)) * scale) / scale
+    mask = rng.random(X.shape) < 0.2
+    X[mask] = rng.choice(special, size=int(mask.sum()))
+    return X
+
+
+@pytest.mark.parametrize('seed', [0, HEART_SEED, KIDNEY_SEED, DIABETES_SEED])
+def test_scalar_and_batch_hashes_match(seed):
+    X = _rows(12)
+    np.testing.assert_array_equal(quantize(X), [quantize_one(row) for row in X.tolist()])
+    expected = [feature_hash_one(quantize_one(row), seed) for row in X.tolist()]
+    # Both the vectorized path and the row-by-row path for small arrays
+    np.testing.assert_array_equal(feature_hash(quantize(X), seed), np.array(expected, dtype=np.uint64))
+    np.testing.assert_array_equal(feature_hash(quantize(X[:3]), seed), np.array(expected[:3], dtype=np.uint64))
+
+
+@pytest.mark.parametrize('n_features, seed', [(13, HEART_SEED), (12, KIDNEY_SEED), (12, DIABETES_SEED)])
+def test_scalar_and_batch_jitter_are_identical(n_features, seed):
+    X = _rows(n_features, seed=seed)
+    base = np.linspace(0.0, 1.0, len(X))
+    scalar = [min(1.0, max(0.0, b + _jitter_one(row, seed))) for b, row in zip(base.tolist(), X.tolist())]
+    np.testing.assert_array_equal(_add_jitter(base, X, seed), scalar)
+    assert (np.abs(_add_jitter(np.full(len(X), 0.5), X, seed) - 0.5) <= JITTER).all()
+
+
+@pytest.mark.parametrize('scalar, batch, n_features', [
+    (calculate_rule_based_heart_risk, calculate_rule_based_heart_risk_batch, 13),
+    (calculate_rule_based_kidney_risk, calculate_rule_based_kidney_risk_batch, 12),
+    (calculate_rule_based_diabetes_risk, calculate_rule_based_diabetes_risk_batch, 12),
+], ids=['heart', 'kidney', 'diabetes'])
+def test_rule_based_scorers_match_their_batch_forms(scalar, batch, n_features):
+    # Flags and codes in their usual range, so the scores span the clip
+    # bounds, with some missing values
+    rng = np.random.default_rng(1)
+    X = rng.integers(0, 3, size=(500, n_features)).astype(np.float64)
+    X[:, 0] = rng.uniform(20, 90, size=len(X)).round(1)
+    X[rng.random(X.shape) < 0.05] = NAN
+    np.testing.assert_array_equal(batch(X), [scalar(row) for row in X.tolist()])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's monotonic clock with one the test moves by hand."""
+    fake = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(caching, 'time', types.SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+class CountingModel:
+    """predict_fn that records the rows it is called with."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, X):
+        self.calls.append(X[:, 0].tolist())
+        return X[:, 0] / 100.0
+
+
+def _counters(name):
+    counters = metrics.snapshot()['counters']
+    return {key.rsplit('.', 1)[1]: value for key, value in counters.items()
+            if key.startswith(f'cache.{name}.')}
+
+
+def _delta(before, after):
+    return {key: after[key] - before.get(key, 0) for key in after if after[key] != before.get(key, 0)}
+
+
+def _patients(*values):
+    return np.array([[value, 1.0, 2.0] for value in values])
+
+
+def test_hits_skip_the_model_and_keep_row_order(clock):
+    cache, model = ResultCache('test-hits', max_entries=16, ttl_seconds=60), CountingModel()
+    before = _counters('test-hits')
+    np.testing.assert_array_equal(cache.predict('heart', 'v1', _patients(10, 20), model), [0.1, 0.2])
+    # Only the new row is computed; results come back in the order asked
+    np.testing.assert_array_equal(cache.predict('heart', 'v1', _patients(30, 10, 20), model), [0.3, 0.1, 0.2])
+    assert model.calls == [[10.0, 20.0], [30.0]]
+    assert _delta(before, _counters('test-hits')) == {'hits': 2, 'misses': 3}
+
+    # Values equal after quantization share an entry
+    cache.predict('heart', 'v1', _patients(10.0000001), model)
+    assert len(model.calls) == 2
+    # The disease and the model version are part of the key
+    cache.predict('kidney', 'v1', _patients(10), model)
+    cache.predict('heart', 'v2', _patients(10), model)
+    assert model.calls[2:] == [[10.0], [10.0]]
+    # No version bypasses the cache
+    cache.predict('heart', None, _patients(10), model)
+    assert len(model.calls) == 5 and len(cache) == 5
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache, model = ResultCache('test-lru', max_entries=3, ttl_seconds=60), CountingModel()
+    before = _counters('test-lru')
+    cache.predict('heart', 'v1', _patients(1, 2, 3), model)
+    # Using 1 makes 2 the least recently used entry
+    cache.predict('heart', 'v1', _patients(1), model)
+    cache.predict('heart', 'v1', _patients(4), model)
+    assert len(cache) == 3
+    assert _delta(before, _counters('test-lru'))['evictions'] == 1
+
+    model.calls.clear()
+    cache.predict('heart', 'v1', _patients(1, 3, 4), model)
+    assert model.calls == []
+    cache.predict('heart', 'v1', _patients(2), model)
+    assert model.calls == [[2.0]]
+
+    # A batch larger than the cache still gets every result
+    np.testing.assert_array_equal(cache.predict('heart', 'v1', _patients(5, 6, 7, 8, 9), model),
+                                  [0.05, 0.06, 0.07, 0.08, 0.09])
+    assert len(cache) == 3
+
+
+def test_entries_expire(clock):
+    cache, model = ResultCache('test-ttl', max_entries=16, ttl_seconds=10), CountingModel()
+    before = _counters('test-ttl')
+    cache.predict('heart', 'v1', _patients(1, 2), model)
+    clock.now += 9.9
+    cache.predict('heart', 'v1', _patients(1), model)
+    assert len(model.calls) == 1
+    # A hit does not extend the entry's lifetime
+    clock.now += 0.2
+    cache.predict('heart', 'v1', _patients(1, 2), model)
+    assert model.calls[1] == [1.0, 2.0]
+    assert _delta(before, _counters('test-ttl')) == {'hits': 1, 'misses': 4, 'expired': 2}
+    assert len(cache) == 2
+
+
+def test_disabled_cache_calls_the_model_every_time(clock):
+    cache, model = ResultCache('test-off', max_entries=0), CountingModel()
+    cache.predict('heart', 'v1', _patients(1), model)
+    cache.predict('heart', 'v1', _patients(1), model)
+    assert len(model.calls) == 2 and len(cache) == 0
+
+
+def test_local_misses_are_served_from_the_shared_table(clock):
+    shared = SharedResultTable(64, ttl_seconds=60)
+    first = ResultCache('test-shared', max_entries=16, ttl_seconds=60, shared=shared)
+    # A second process's cache, with its own LRU, over the same table
+    second = ResultCache('test-shared', max_entries=16, ttl_seconds=60, shared=shared)
+    model = CountingModel()
+    first.predict('heart', 'v1', _patients(1, 2), model)
+    before = _counters('test-shared')
+    np.testing.assert_array_equal(second.predict('heart', 'v1', _patients(1, 2, 3), model), [0.01, 0.02, 0.03])
+    assert model.calls == [[1.0, 2.0], [3.0]]
+    assert _delta(before, _counters('test-shared')) == {'shared_hits': 2, 'misses': 1}
+    # Another model version does not see the entries
+    second.predict('heart', 'v2', _patients(1), model)
+    assert model.calls[-1] == [1.0]
+
+    first.clear()
+    assert len(first) == 0
+    assert not shared.get_many(np.arange(1, 65, dtype=np.uint64))[0].any()
@@ -0,0 +1,73 @@
+"""
+Equivalence of the two field parsers in features.py.
+
+FieldSchema.parse_row() (plain Python, used per request) and read_fields()
+followed by FieldSchema.validate() (NumPy, used by /api/assess and the
+diabetes model rows) must turn the same records into bit-identical arrays,
+including the sign of zero, since the result cache hashes the values.
+
+    python -m pytest test_features.py
+"""
+import numpy as np
+import pytest
+
+from features import Field, FieldSchema, read_fields
+from scoring import HEART_SCHEMA, KIDNEY_SCHEMA, DIABETES_SCHEMA
+from diabetes_pipeline import DIABETES_MODEL_SCHEMA
+
+MISSING = object()
+
+
+def _candidates(field):
+    # Values a submitted field may hold: missing, unparsable, the range edges
+    # with their neighbours, out of range, fractions and halves, as strings
+    # (forms) and as numbers (JSON)
+    low, high = float(field.low), float(field.high)
+    numbers = [low, high, np.nextafter(low, -np.inf), np.nextafter(high, np.inf),
+               low - 1, high + 1, -0.3, -0.0, 0.5, 1.5, 2.5, (low + high) / 2, low + 0.49,
+               1e300, -1e300]
+    strings = [repr(float(x)) for x in numbers] + ['nan', 'inf', '-inf', ' 3 ', '1e3', 'abc', '']
+    return [MISSING, None, True, False] + numbers + [int(low), int(high)] + strings
+
+
+def _records(schema, n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    candidates = [_candidates(field) for field in schema.fields]
+    records = []
+    for _ in range(n):
+        record = {}
+        for field, values in zip(schema.fields, candidates):
+            value = values[rng.integers(len(values))]
+            if value is not MISSING:
+                record[field.name] = value
+        records.append(record)
+    return records
+
+
+@pytest.mark.parametrize('schema', [HEART_SCHEMA, KIDNEY_SCHEMA, DIABETES_SCHEMA, DIABETES_MODEL_SCHEMA],
+                         ids=['heart', 'kidney', 'diabetes', 'diabetes-model'])
+def test_parse_row_matches_read_fields_and_validate(schema):
+    records = _records(schema)
+    parsed = schema.parse_many(records)
+    validated = schema.validate(read_fields(records, schema.names))
+
+    np.testing.assert_array_equal(parsed.view(np.uint64), validated.view(np.uint64))
+    assert ((parsed >= schema.low) & (parsed <= schema.high)).all()
+    assert (parsed[:, schema.integral] == np.round(parsed[:, schema.integral])).all()
+    # parse() fills the same row
+    np.testing.assert_array_equal(schema.parse(records[0])[0], parsed[0])
+
+
+def test_out_of_range_values_are_clamped_and_missing_ones_defaulted():
+    schema = FieldSchema([Field('age', 50.0, 0, 120, 'float'), Field('cp', 0.0, 0, 3, 'int'),
+                          Field('bmi', 27.0, 12, 98, 'int')])
+    rows = [
+        ({'age': '130', 'cp': '7', 'bmi': '5'}, [120.0, 3.0, 12.0]),
+        ({'age': -4, 'cp': -1, 'bmi': 250}, [0.0, 0.0, 98.0]),
+        ({'age': 'inf', 'cp': '2.5', 'bmi': '30.6'}, [120.0, 2.0, 31.0]),
+        ({'age': '', 'cp': 'x', 'bmi': 'nan'}, [50.0, 0.0, 27.0]),
+        ({}, [50.0, 0.0, 27.0]),
+    ]
+    for record, expected in rows:
+        assert schema.parse_row(record) == expected
+        np.testing.assert_array_equal(schema.validate(read_fields([record], schema.names))[0], expected)
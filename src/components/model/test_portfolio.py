@@ -0,0 +1,101 @@
+"""
+Tests of the streaming portfolio summary (portfolio.py).
+
+    python -m pytest test_portfolio.py
+"""
+import json
+
+import numpy as np
+import pytest
+
+from portfolio import PortfolioSummary, RISK_COLUMNS
+from premiums import premium_table
+from scoring import combine_risks
+
+NAN = float('nan')
+
+
+def _applicants(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    return {name: rng.beta(2, 5, size=n) for name in RISK_COLUMNS}
+
+
+def _summarize(applicants, **kwargs):
+    return PortfolioSummary(**kwargs).update(*(applicants[name] for name in RISK_COLUMNS),
+                                             applicants.get('combined_risk'))
+
+
+def _assert_same(summary, expected):
+    a, b = summary.to_dict(), expected.to_dict()
+    assert a['count'] == b['count'] and a['skipped'] == b['skipped']
+    assert a['tiers'] == b['tiers']
+    assert a['premium_totals'] == b['premium_totals']
+    assert a['sketch'] == b['sketch']
+    assert a['combined_risk_quantiles'] == b['combined_risk_quantiles']
+    for name in a['risk_sums']:
+        assert a['risk_sums'][name] == pytest.approx(b['risk_sums'][name], rel=1e-12)
+
+
+def test_totals_match_a_direct_computation():
+    applicants = _applicants()
+    summary = _summarize(applicants).to_dict()
+    combined = combine_risks(*(applicants[name] for name in RISK_COLUMNS))
+    quotes = premium_table.quote(combined, interpolate=True)
+
+    assert summary['count'] == len(combined) and summary['skipped'] == 0
+    assert summary['mean_risk']['combined_risk'] == pytest.approx(combined.mean(), rel=1e-12)
+    assert summary['premium_totals']['premium'] == int(quotes['premium'].sum())
+    assert [count for _, count in summary['tiers']] == np.bincount(quotes['tier_index'], minlength=10).tolist()
+    # Quantiles are accurate to half a sketch bin
+    assert summary['combined_risk_quantiles']['p90'] == pytest.approx(np.quantile(combined, 0.9), abs=1e-4)
+
+
+def test_rows_with_a_missing_risk_are_skipped_everywhere():
+    applicants = _applicants(1000)
+    with_nan = {name: values.copy() for name, values in applicants.items()}
+    with_nan['heart_risk'][[3, 50]] = NAN
+    with_nan['diabetes_risk'][[50, 700]] = NAN
+    kept = np.ones(1000, dtype=bool)
+    kept[[3, 50, 700]] = False
+
+    summary = _summarize(with_nan)
+    # The same totals as for the complete rows alone, plus the skipped count
+    expected = _summarize({name: values[kept] for name, values in applicants.items()})
+    expected.skipped = 3
+    _assert_same(summary, expected)
+    report = summary.to_dict()
+    assert report['count'] == 997 and report['skipped'] == 3
+    # Means are over the applicants kept, not diluted by the skipped ones
+    assert report['mean_risk']['heart_risk'] == pytest.approx(applicants['heart_risk'][kept].mean(), rel=1e-12)
+    assert sum(count for _, count in report['tiers']) == 997
+
+    # A NaN stored combined risk is skipped too, rather than priced in the top tier
+    combined = combine_risks(*(applicants[name] for name in RISK_COLUMNS))
+    combined[:10] = NAN
+    report = _summarize(dict(applicants, combined_risk=combined)).to_dict()
+    assert report['skipped'] == 10 and sum(count for _, count in report['tiers']) == 990
+
+
+def test_merged_shards_match_a_single_pass():
+    applicants = _applicants()
+    applicants['kidney_risk'][::997] = NAN
+    single = _summarize(applicants)
+
+    merged = PortfolioSummary()
+    for start in range(0, 20000, 3000):
+        shard = _summarize({name: values[start:start + 3000] for name, values in applicants.items()})
+        # Shards travel as JSON between machines
+        merged.merge(PortfolioSummary.from_dict(json.loads(json.dumps(shard.to_dict()))))
+    _assert_same(merged, single)
+    assert merged.skipped == len(range(0, 20000, 997))
+
+    # Chunked updates of one summary give the same totals
+    chunked = PortfolioSummary()
+    for start in range(0, 20000, 4096):
+        chunked.update(*(applicants[name][start:start + 4096] for name in RISK_COLUMNS))
+    _assert_same(chunked, single)
+
+
+def test_merge_refuses_different_sketches():
+    with pytest.raises(ValueError):
+        PortfolioSummary().merge(PortfolioSummary(bins=100))
@@ -0,0 +1,89 @@
+"""
+Parity of PremiumTable with the calculate_insurance_premium() ladder it
+replaced.
+
+The ladder below is the original, verbatim. PremiumTable.quote() and
+quote_one() must put every risk score in the same tier, on the tier edges,
+for scores like 0.1 or 0.29 whose percentage is not exactly representable,
+and for NaN.
+
+    python -m pytest test_premiums.py
+"""
+import numpy as np
+import pytest
+
+from premiums import PremiumTable, premium_table
+from scoring import calculate_insurance_premium
+
+NAN = float('nan')
+
+
+def premium_ladder(risk_score):
+    risk_percentage = risk_score * 100
+
+    if risk_percentage <= 10:
+        return "Very Low", 2000, 3000
+    elif risk_percentage <= 20:
+        return "Low", 3000, 5000
+    elif risk_percentage <= 30:
+        return "Low-Medium", 5000, 8000
+    elif risk_percentage <= 40:
+        return "Medium", 8000, 12000
+    elif risk_percentage <= 50:
+        return "Medium-High", 12000, 17000
+    elif risk_percentage <= 60:
+        return "High", 17000, 22000
+    elif risk_percentage <= 70:
+        return "High-Risk", 22000, 28000
+    elif risk_percentage <= 80:
+        return "Very High", 28000, 35000
+    elif risk_percentage <= 90:
+        return "Critical", 35000, 43000
+    else:
+        return "Extremely Critical", 43000, 53000
+
+
+def _risk_scores():
+    # Every whole percentage written both ways (k / 100 and k * 0.01, which
+    # round differently), the floats either side of each tier edge, computed
+    # scores such as 0.1 + 0.2, out-of-range values and NaN
+    scores = []
+    for k in range(101):
+        for score in (k / 100, k * 0.01, (k + 0.5) / 100):
+            scores += [np.nextafter(score, -np.inf), score, np.nextafter(score, np.inf)]
+    for edge in range(10, 100, 10):
+        # The scores whose percentage lands just either side of the edge
+        for x in (np.nextafter(edge, -np.inf), float(edge), np.nextafter(edge, np.inf)):
+            scores.append(x / 100)
+    scores += [0.1 + 0.2, 0.7 + 0.1, 1 - 0.9, 0.3 * 3, 0.0, -0.0, -0.01, 1.0, 1.5, np.inf, -np.inf, NAN]
+    rng = np.random.default_rng(0)
+    return scores + rng.random(2000).tolist()
+
+
+def test_quotes_match_the_ladder():
+    scores = _risk_scores()
+    expected = [premium_ladder(score) for score in scores]
+
+    assert [premium_table.quote_one(score) for score in scores] == expected
+    assert [calculate_insurance_premium(score) for score in scores] == expected
+    quotes = premium_table.quote(np.array(scores))
+    assert list(zip(quotes['risk_tier'].tolist(), quotes['min_premium'].tolist(),
+                    quotes['max_premium'].tolist())) == expected
+    # A single score takes the same path as a batch
+    assert premium_table.quote([scores[1]])['risk_tier'][0] == expected[1][0]
+
+
+def test_interpolated_premiums_stay_in_the_tier_and_rise_with_risk():
+    scores = np.array(sorted(score for score in _risk_scores() if 0 <= score <= 1))
+    quotes = premium_table.quote(scores, interpolate=True)
+    premium = quotes['premium']
+    assert ((quotes['min_premium'] <= premium) & (premium <= quotes['max_premium'])).all()
+    assert (np.diff(premium) >= 0).all()
+    assert premium[0] == 2000 and premium[-1] == 53000
+    # NaN is quoted at the top of the last tier, like the ladder's else branch
+    assert premium_table.quote([NAN], interpolate=True)['premium'][0] == 53000
+
+
+def test_tiers_must_be_sorted():
+    with pytest.raises(ValueError):
+        PremiumTable([(20, "Low", 3000, 5000), (10, "Very Low", 2000, 3000)])
@@ -0,0 +1,93 @@
+"""
+Tests of the repricing of stored applicants (repricing.py).
+
+    python -m pytest test_repricing.py
+"""
+import json
+
+import numpy as np
+import pytest
+
+from premiums import PREMIUM_TIERS
+from repricing import RepricingDiff, current_params, load_params, reprice, reprice_chunks
+
+NAN = float('nan')
+
+
+def _pricing_file(tmp_path, data):
+    path = tmp_path / 'pricing.json'
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def _chunks(n=5000, seed=0, chunk_rows=1024):
+    rng = np.random.default_rng(seed)
+    risks = {name: rng.beta(2, 4, size=n) for name in ('heart_risk', 'kidney_risk', 'diabetes_risk')}
+    return [{name: values[start:start + chunk_rows] for name, values in risks.items()}
+            for start in range(0, n, chunk_rows)]
+
+
+def test_unchanged_parameters_change_nothing():
+    diff = reprice_chunks(_chunks(), current_params()).to_dict()
+    assert diff['count'] == 5000 and diff['skipped'] == 0
+    assert diff['tier_changed'] == 0 and diff['transitions'] == []
+    assert diff['premium_totals']['old'] == diff['premium_totals']['new']
+
+
+def test_load_params_keeps_the_keys_left_out(tmp_path):
+    params = load_params(_pricing_file(tmp_path, {'weights': {'heart': 0.45, 'kidney': 0.35}}))
+    base = current_params()
+    assert params.weights == (0.45, 0.35, base.weights[2])
+    assert params.override_threshold == base.override_threshold
+    assert params.table.labels == base.table.labels
+
+
+@pytest.mark.parametrize('data', [
+    {'weights': {'heart': -0.1}},
+    {'weights': {'heart': 0, 'kidney': 0, 'diabetes': 0}},
+    {'weights': {'heart': float('inf')}},
+    {'override_threshold': 1.5},
+    {'tiers': [[50, "Low", 2000, 3000], [40, "High", 3000, 5000], [100, "Top", 5000, 9000]]},
+    {'tiers': [[50, "Low", 2000, 3000], [50, "High", 3000, 5000], [100, "Top", 5000, 9000]]},
+    {'tiers': [[0, "None", 0, 0], [100, "All", 2000, 3000]]},
+    {'tiers': [[50, "Low", 2000, 3000], [90, "High", 3000, 5000]]},
+    {'tiers': [[50, "Low", 3000, 2000], [100, "High", 3000, 5000]]},
+    {'tiers': []},
+], ids=['negative-weight', 'zero-weights', 'infinite-weight', 'threshold', 'unsorted-edges',
+        'repeated-edge', 'zero-edge', 'last-edge', 'min-above-max', 'no-tiers'])
+def test_invalid_parameters_are_refused(tmp_path, data):
+    with pytest.raises(ValueError):
+        load_params(_pricing_file(tmp_path, data))
+
+
+def test_valid_tiers_are_accepted(tmp_path):
+    tiers = [[50, "Low", 2000, 3000], [100, "High", 3000, 5000]]
+    params = load_params(_pricing_file(tmp_path, {'tiers': tiers}))
+    assert params.table.labels == ["Low", "High"]
+    assert load_params(_pricing_file(tmp_path, {'tiers': PREMIUM_TIERS})).table.labels == current_params().table.labels
+
+
+def test_applicants_with_a_missing_risk_are_skipped():
+    chunks = _chunks()
+    chunks[0]['heart_risk'] = chunks[0]['heart_risk'].copy()
+    chunks[0]['heart_risk'][:7] = NAN
+    # A stored combined risk that is missing on other rows
+    chunks[1]['combined_risk'] = np.full(len(chunks[1]['heart_risk']), 0.2)
+    chunks[1]['combined_risk'][:5] = NAN
+
+    diff = reprice_chunks(chunks, current_params()).to_dict()
+    assert diff['skipped'] == 12 and diff['count'] == 5000 - 12
+    assert sum(count for _, _, count in diff['transitions']) == diff['tier_changed']
+
+    priced = reprice(chunks[0]['heart_risk'], chunks[0]['kidney_risk'], chunks[0]['diabetes_risk'],
+                     current_params())
+    assert priced['missing'][:7].all() and not priced['missing'][7:].any()
+
+
+def test_diff_counts_tier_moves_by_label():
+    params = current_params()
+    old = reprice([0.95, 0.2], [0.1, 0.2], [0.1, 0.2], params)
+    new = reprice([0.95, 0.2], [0.1, 0.2], [0.1, 0.2], params._replace(override_floor=0.5))
+    diff = RepricingDiff(params.table, params.table).update(old, new).to_dict()
+    assert diff['count'] == 2 and diff['tier_changed'] == 1
+    assert diff['premium_decreased'] == 1 and diff['overridden'] == {'old': 1, 'new': 1}
@@ -0,0 +1,241 @@
+"""
+Parity of the compiled rule kernels with the if/elif ladders they replaced.
+
+The ladders below are the original rule-based scorers, kept verbatim except
+for the random jitter. The kernels compiled from the tables in rules.py must
+give bit-identical scores, on every bucket edge and with NaN inputs, both
+through score_one() and over a whole batch. So must the precomputed
+diabetes lookup table.
+
+    python -m pytest test_rules.py
+"""
+import numpy as np
+import pytest
+
+from rules import heart_kernel, kidney_kernel, diabetes_kernel, diabetes_lookup
+
+NAN = float('nan')
+
+
+def heart_ladder(features):
+    age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = features
+    risk_score = 0.0
+    if age < 40:
+        risk_score += 0.1
+    elif age < 50:
+        risk_score += 0.2
+    elif age < 60:
+        risk_score += 0.3
+    elif age < 70:
+        risk_score += 0.4
+    else:
+        risk_score += 0.5
+    if sex == 1:
+        risk_score += 0.1
+    if cp == 0:
+        risk_score += 0.3
+    elif cp == 1:
+        risk_score += 0.2
+    elif cp == 2:
+        risk_score += 0.1
+    elif cp == 3:
+        risk_score += 0.05
+    if trestbps < 120:
+        risk_score += 0.05
+    elif trestbps < 130:
+        risk_score += 0.1
+    elif trestbps < 140:
+        risk_score += 0.2
+    elif trestbps < 160:
+        risk_score += 0.3
+    else:
+        risk_score += 0.4
+    if chol < 200:
+        risk_score += 0.05
+    elif chol < 240:
+        risk_score += 0.1
+    else:
+        risk_score += 0.3
+    if fbs == 1:
+        risk_score += 0.1
+    if restecg > 0:
+        risk_score += 0.1
+    if thalach > 160:
+        risk_score += 0.05
+    elif thalach > 140:
+        risk_score += 0.1
+    else:
+        risk_score += 0.2
+    if exang == 1:
+        risk_score += 0.3
+    risk_score += min(0.3, oldpeak * 0.1)
+    if slope == 2:
+        risk_score += 0.2
+    risk_score += min(0.3, ca * 0.1)
+    if thal > 1:
+        risk_score += 0.2
+    return min(1.0, risk_score / 3.0)
+
+
+def kidney_ladder(features):
+    age, bp, sg, al, su, rbc, pc, pcc, ba, bgr, bu, sc = features
+    risk_score = 0.0
+    if age >= 60:
+        risk_score += 0.2
+    elif age >= 40:
+        risk_score += 0.1
+    if bp >= 140:
+        risk_score += 0.2
+    elif bp >= 130:
+        risk_score += 0.1
+    risk_score += min(0.3, al * 0.06)
+    risk_score += min(0.2, su * 0.04)
+    if rbc == 1:
+        risk_score += 0.1
+    if pc == 1:
+        risk_score += 0.1
+    if pcc == 1:
+        risk_score += 0.1
+    if ba == 1:
+        risk_score += 0.1
+    if bgr > 200:
+        risk_score += 0.2
+    elif bgr > 140:
+        risk_score += 0.1
+    if bu > 50:
+        risk_score += 0.3
+    elif bu > 40:
+        risk_score += 0.2
+    elif bu > 30:
+        risk_score += 0.1
+    if sc > 1.5:
+        risk_score += 0.3
+    elif sc > 1.2:
+        risk_score += 0.2
+    elif sc > 0.9:
+        risk_score += 0.1
+    return min(1.0, risk_score / 2.0)
+
+
+def diabetes_ladder(features):
+    (age, gender, polyuria, polydipsia, sudden_weight_loss, weakness, polyphagia, genital_thrush,
+     visual_blurring, itching, irritability, delayed_healing) = features
+    risk_score = 0.0
+    if age >= 60:
+        risk_score += 0.2
+    elif age >= 40:
+        risk_score += 0.1
+    elif age >= 30:
+        risk_score += 0.05
+    if gender == 1 and age >= 50:
+        risk_score += 0.05
+    if polyuria == 1:
+        risk_score += 0.15
+    if polydipsia == 1:
+        risk_score += 0.15
+    if sudden_weight_loss == 1:
+        risk_score += 0.15
+    if weakness == 1:
+        risk_score += 0.1
+    if polyphagia == 1:
+        risk_score += 0.15
+    if genital_thrush == 1:
+        risk_score += 0.1
+    if visual_blurring == 1:
+        risk_score += 0.1
+    if itching == 1:
+        risk_score += 0.05
+    if irritability == 1:
+        risk_score += 0.05
+    if delayed_healing == 1:
+        risk_score += 0.1
+    return min(1.0, risk_score / 1.6)
+
+
+def _around(*edges):
+    # Each edge, the values just either side of it, and NaN
+    values = [NAN]
+    for edge in edges:
+        values += [np.nextafter(edge, -np.inf), edge, np.nextafter(edge, np.inf)]
+    return values
+
+
+FLAG = [0, 1, 2, NAN]
+
+# Values drawn for each field: every threshold of the ladders with its
+# neighbours, codes and out-of-range codes, and NaN
+HEART_VALUES = [
+    _around(40, 50, 60, 70) + [0, 25, 95],
+    FLAG,
+    [0, 1, 2, 3, 4, NAN],
+    _around(120, 130, 140, 160) + [90, 200],
+    _around(200, 240) + [120, 400],
+    FLAG,
+    _around(0) + [1, 2],
+    _around(140, 160) + [70, 200],
+    FLAG,
+    _around(3) + [0, 0.1, 1.4, 6.2],
+    [0, 1, 2, 3, NAN],
+    _around(3) + [0, 1, 2, 4],
+    _around(1) + [0, 2, 3],
+]
+KIDNEY_VALUES = [
+    _around(40, 60) + [2, 90],
+    _around(130, 140) + [50, 180],
+    [1.005, 1.01, 1.015, 1.02, 1.025, NAN],
+    _around(5) + [0, 1, 2, 3, 4],
+    _around(5) + [0, 1, 2, 3, 4],
+    FLAG,
+    FLAG,
+    FLAG,
+    FLAG,
+    _around(140, 200) + [22, 490],
+    _around(30, 40, 50) + [1.5, 391],
+    _around(0.9, 1.2, 1.5) + [0.4, 76],
+]
+DIABETES_VALUES = [_around(30, 40, 50, 60) + [16, 90], FLAG] + [FLAG] * 10
+
+
+def _patients(values, n=5000, seed=0):
+    # Random combinations of the candidate values, plus for every field each
+    # candidate value on an otherwise typical patient
+    rng = np.random.default_rng(seed)
+    X = np.array([[column[k] for column, k in zip(values, ks)]
+                  for ks in zip(*(rng.integers(len(column), size=n) for column in values))])
+    base = np.array([column[-1] for column in values], dtype=np.float64)
+    rows = []
+    for j, column in enumerate(values):
+        for value in column:
+            row = base.copy()
+            row[j] = value
+            rows.append(row)
+    return np.vstack([X, rows])
+
+
+@pytest.mark.parametrize('kernel, ladder, values', [
+    (heart_kernel, heart_ladder, HEART_VALUES),
+    (kidney_kernel, kidney_ladder, KIDNEY_VALUES),
+    (diabetes_kernel, diabetes_ladder, DIABETES_VALUES),
+    (diabetes_lookup, diabetes_ladder, DIABETES_VALUES),
+], ids=['heart', 'kidney', 'diabetes', 'diabetes-lookup'])
+def test_kernel_matches_ladder(kernel, ladder, values):
+    X = _patients(values)
+    expected = np.array([ladder(row) for row in X.tolist()])
+    assert not np.isnan(expected).any()
+
+    scalar = np.array([kernel.score_one(row) for row in X.tolist()])
+    np.testing.assert_array_equal(scalar, expected)
+    np.testing.assert_array_equal(kernel(X), expected)
+    # A batch of one row takes the same path as a large batch
+    np.testing.assert_array_equal(kernel(X[:1]), expected[:1])
+
+
+def test_lookup_covers_every_flag_combination():
+    # Every entry of the table, at ages on both sides of each threshold
+    n_flags = len(diabetes_lookup.fields) - 1
+    flags = (np.arange(1 << n_flags)[:, None] >> np.arange(n_flags)) & 1
+    for age in _around(30, 40, 50, 60) + [16, 90]:
+        X = np.column_stack([np.full(len(flags), age), flags]).astype(np.float64)
+        expected = np.array([diabetes_ladder(row) for row in X.tolist()])
+        np.testing.assert_array_equal(diabetes_lookup(X), expected)
+        np.testing.assert_array_equal([diabetes_lookup.score_one(row) for row in X.tolist()], expected)
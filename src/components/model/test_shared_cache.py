@@ -0,0 +1,134 @@
+"""
+Tests of the result table shared by worker processes (shared_cache.py).
+
+    python -m pytest test_shared_cache.py
+"""
+import os
+import types
+
+import numpy as np
+import pytest
+
+import shared_cache
+from shared_cache import PROBES, SharedResultTable
+
+
+def _keys(n, start=1):
+    # Nonzero key hashes; zero marks an empty slot
+    return np.arange(start, start + n, dtype=np.uint64)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the table's wall clock with one the test moves by hand."""
+    fake = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(shared_cache, 'time', types.SimpleNamespace(time=lambda: fake.now))
+    return fake
+
+
+def _live_entries(table, now):
+    rows = table._table
+    return int(np.count_nonzero((rows[:, 0] != 0) & (rows[:, 3].view(np.float64) > now)))
+
+
+def test_put_and_get(clock):
+    table = SharedResultTable(64, ttl_seconds=60)
+    keys = _keys(10)
+    assert table.put_many(keys, np.linspace(0.0, 0.9, 10)) == 0
+
+    found, values = table.get_many(keys)
+    assert found.all()
+    np.testing.assert_array_equal(values, np.linspace(0.0, 0.9, 10))
+    found, _ = table.get_many(_keys(5, start=100))
+    assert not found.any()
+
+    # Replacing a key keeps a single entry for it
+    table.put_many(keys[:1], [0.5])
+    assert table.get_many(keys[:1])[1][0] == 0.5
+    assert _live_entries(table, clock.now) == 10
+
+
+def test_slots_are_rounded_up_to_a_power_of_two():
+    assert SharedResultTable(1, 1).slots == PROBES
+    assert SharedResultTable(100, 1).slots == 128
+    assert SharedResultTable(128, 1).nbytes == 128 * 32
+
+
+def test_size_is_bounded_and_evictions_are_counted(clock):
+    table = SharedResultTable(16, ttl_seconds=60)
+    evicted = 0
+    for i in range(20):
+        clock.now += 1
+        # Keys 1..40 share the 16 slots
+        evicted += table.put_many(_keys(2, start=1 + 2 * i), [0.1, 0.2])
+        assert _live_entries(table, clock.now) <= table.slots
+    assert _live_entries(table, clock.now) == table.slots
+    assert evicted == 40 - table.slots
+    assert table.nbytes == 16 * 32
+
+    # The most recent keys survive: the entry expiring soonest is evicted
+    found, _ = table.get_many(_keys(40))
+    assert found[-4:].all()
+    assert np.count_nonzero(found) == table.slots
+
+
+def test_entries_expire(clock):
+    table = SharedResultTable(64, ttl_seconds=10)
+    keys = _keys(8)
+    table.put_many(keys, np.full(8, 0.3))
+    clock.now += 9.9
+    assert table.get_many(keys)[0].all()
+    clock.now += 0.2
+    assert not table.get_many(keys)[0].any()
+
+    # Expired slots are reused without counting as evictions
+    assert table.put_many(_keys(8, start=100), np.full(8, 0.4)) == 0
+
+
+def test_torn_slot_reads_as_a_miss(clock):
+    table = SharedResultTable(64, ttl_seconds=60)
+    keys = _keys(4)
+    table.put_many(keys, [0.1, 0.2, 0.3, 0.4])
+    slot = np.flatnonzero(table._table[:, 0] == keys[1])[0]
+    # A writer in another process has replaced the value but not yet the checksum
+    table._table[slot, 2] = np.float64(0.9).view(np.uint64)
+
+    found, values = table.get_many(keys)
+    np.testing.assert_array_equal(found, [True, False, True, True])
+    np.testing.assert_array_equal(values[found], [0.1, 0.3, 0.4])
+
+    table.clear()
+    assert not table.get_many(keys)[0].any()
+
+
+def _in_child(work):
+    # Run work() in a forked child; return its exit status (0 on success)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if work() else 1)
+        except BaseException:
+            os._exit(2)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork()")
+def test_entries_are_shared_across_fork():
+    table = SharedResultTable(1024, ttl_seconds=60)
+    parent_keys, child_keys = _keys(100), _keys(100, start=1000)
+    table.put_many(parent_keys, np.full(100, 0.25))
+
+    def child():
+        # Sees the parent's entries, and writes its own
+        found, values = table.get_many(parent_keys)
+        table.put_many(child_keys, np.full(100, 0.75))
+        return found.all() and (values == 0.25).all()
+    assert _in_child(child) == 0
+
+    found, values = table.get_many(child_keys)
+    assert found.all()
+    assert (values == 0.75).all()
+
+    # Clearing the table in one process clears it for every process
+    table.clear()
+    assert _in_child(lambda: not table.get_many(parent_keys)[0].any()) == 0